@@ -1,23 +1,11 @@
 # gemini_basic_chat.py
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
+from gemini_client import get_client
 
-# --------------------🔐 Load API Key --------------------
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("❌ GEMINI_API_KEY not found in .env file.")
-
-# --------------------🤖 Initialize Gemini Client --------------------
-client = OpenAI(
-    api_key=api_key,
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
-)
 
 # --------------------💬 Run Basic Chat Completion --------------------
 def main():
+    client = get_client()
     print("🧠 Asking Gemini a question...\n")
 
     response = client.chat.completions.create(
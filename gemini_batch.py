@@ -0,0 +1,376 @@
+import hashlib
+import json
+import os
+import random
+import shutil
+import time
+import uuid
+from gemini_client import MODEL, get_client
+
+# --------------------📦 Offline Bulk Jobs --------------------
+# Shards an input JSONL of prompts into OpenAI batch-format files, submits
+# them to the batch endpoint, polls with backoff and merges the results back
+# in input order. A checkpoint in the work directory records each shard's
+# progress so a crashed job resumes without resubmitting finished shards.
+#
+# Input lines:  {"prompt": "..."} or {"messages": [...]}, optional "id"
+# Output lines: {"index": i, "id": ..., "response": {...} | null, "error": ... | null}
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+CHECKPOINT_FILE = "checkpoint.json"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+# --------------------🧩 Batch Request Lines --------------------
+def custom_id(index: int) -> str:
+    return f"req-{index:09d}"
+
+
+def index_of(custom_id: str) -> int:
+    return int(custom_id.rsplit("-", 1)[1])
+
+
+def to_batch_line(index: int, record: dict, model: str, system: str | None) -> dict:
+    if "messages" in record:
+        messages = record["messages"]
+    else:
+        messages = [{"role": "user", "content": record["prompt"]}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+    return {
+        "custom_id": custom_id(index),
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {"model": record.get("model", model), "messages": messages},
+    }
+
+
+# --------------------💾 Checkpoint --------------------
+def load_checkpoint(work_dir: str) -> dict | None:
+    path = os.path.join(work_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(work_dir: str, state: dict):
+    # Write-then-rename so a crash never leaves a half-written checkpoint
+    path = os.path.join(work_dir, CHECKPOINT_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+# --------------------✂️ Sharding --------------------
+def shard_input(input_path: str, work_dir: str, shard_size: int,
+                model: str, system: str | None) -> dict:
+    """Stream the input into shard files and return a fresh job state."""
+    shards = []
+    ids = {}
+    out = None
+
+    def close_shard():
+        if out:
+            out.close()
+
+    with open(input_path, "r", encoding="utf-8") as f:
+        index = 0
+        for line in f:
+            if not line.strip():
+                continue
+            if index % shard_size == 0:
+                close_shard()
+                shard = {
+                    "index": len(shards),
+                    "start": index,
+                    "count": 0,
+                    "path": os.path.join(work_dir, f"shard-{len(shards):05d}.jsonl"),
+                    "status": "pending",
+                }
+                shards.append(shard)
+                out = open(shard["path"], "w", encoding="utf-8")
+            record = json.loads(line)
+            if "id" in record:
+                ids[str(index)] = record["id"]
+            out.write(json.dumps(to_batch_line(index, record, model, system)) + "\n")
+            shards[-1]["count"] += 1
+            index += 1
+    close_shard()
+
+    with open(os.path.join(work_dir, "ids.json"), "w", encoding="utf-8") as f:
+        json.dump(ids, f)
+
+    return {
+        "input": os.path.abspath(input_path),
+        "input_sha256": file_digest(input_path),
+        "shard_size": shard_size,
+        "model": model,
+        "system": system,
+        "shards": shards,
+    }
+
+
+def same_job(state: dict, input_path: str, shard_size: int, model: str, system: str | None) -> bool:
+    # Hash the content: an edit that keeps the size (or mtime) must not reuse stale shards
+    return (
+        state.get("input") == os.path.abspath(input_path)
+        and state.get("shard_size") == shard_size
+        and state.get("model") == model
+        and state.get("system") == system
+        and state.get("input_sha256") == file_digest(input_path)
+    )
+
+
+# --------------------☁️ Batch Backends --------------------
+class OpenAIBatchBackend:
+    """Gemini's OpenAI-compatible Files + Batches API."""
+
+    def __init__(self, client=None):
+        self.client = client or get_client()
+
+    def submit(self, path: str) -> str:
+        with open(path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        return batch.id
+
+    def poll(self, batch_id: str) -> dict:
+        batch = self.client.batches.retrieve(batch_id)
+        return {
+            "status": batch.status,
+            "output_file_id": batch.output_file_id,
+            "error_file_id": batch.error_file_id,
+        }
+
+    def download(self, file_id: str, dest: str):
+        self.client.files.content(file_id).write_to_file(dest)
+
+
+class LocalBatchBackend:
+    """In-process stand-in for the batch endpoint, used for tests and dry runs.
+
+    Each batch "completes" after `polls_to_complete` polls and writes its
+    results in reverse order, so callers must not rely on output ordering.
+    """
+
+    def __init__(self, store_dir: str, responder=None, polls_to_complete: int = 1):
+        self.store_dir = store_dir
+        self.responder = responder or echo_responder
+        self.polls_to_complete = polls_to_complete
+        self.polls = {}
+        os.makedirs(store_dir, exist_ok=True)
+
+    def submit(self, path: str) -> str:
+        batch_id = f"batch-local-{uuid.uuid4().hex[:12]}"
+        shutil.copyfile(path, os.path.join(self.store_dir, batch_id + ".input.jsonl"))
+        self.polls[batch_id] = 0
+        return batch_id
+
+    def poll(self, batch_id: str) -> dict:
+        self.polls[batch_id] = self.polls.get(batch_id, 0) + 1
+        if self.polls[batch_id] < self.polls_to_complete:
+            return {"status": "in_progress", "output_file_id": None, "error_file_id": None}
+
+        output_path = os.path.join(self.store_dir, batch_id + ".output.jsonl")
+        if not os.path.exists(output_path):
+            with open(os.path.join(self.store_dir, batch_id + ".input.jsonl"), encoding="utf-8") as f:
+                requests = [json.loads(line) for line in f]
+            with open(output_path, "w", encoding="utf-8") as out:
+                for request in reversed(requests):
+                    body = self.responder(request["body"])
+                    out.write(json.dumps({
+                        "id": f"resp-{request['custom_id']}",
+                        "custom_id": request["custom_id"],
+                        "response": {"status_code": 200, "body": body},
+                        "error": None,
+                    }) + "\n")
+        return {"status": "completed", "output_file_id": output_path, "error_file_id": None}
+
+    def download(self, file_id: str, dest: str):
+        shutil.copyfile(file_id, dest)
+
+
+def echo_responder(body: dict) -> dict:
+    last = body["messages"][-1]["content"]
+    return {
+        "object": "chat.completion",
+        "model": body["model"],
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": f"echo: {last}"},
+        }],
+    }
+
+
+# --------------------🔁 Submit & Poll --------------------
+def run_shards(state: dict, work_dir: str, backend, max_in_flight: int,
+               poll_interval: float, max_poll_interval: float):
+    """Drive every unfinished shard to a terminal state, yielding each as it finishes."""
+    waiting = [s for s in state["shards"] if s["status"] in ("pending", "failed")]
+    in_flight = [s for s in state["shards"] if s["status"] == "submitted"]
+    for shard in state["shards"]:
+        if shard["status"] == "completed":
+            yield shard
+
+    delay = poll_interval
+    while waiting or in_flight:
+        while waiting and len(in_flight) < max_in_flight:
+            shard = waiting.pop(0)
+            shard["batch_id"] = backend.submit(shard["path"])
+            shard["status"] = "submitted"
+            shard.pop("error", None)
+            save_checkpoint(work_dir, state)
+            in_flight.append(shard)
+            print(f"📤 Submitted shard {shard['index']} ({shard['count']} requests) as {shard['batch_id']}")
+
+        progressed = False
+        for shard in list(in_flight):
+            info = backend.poll(shard["batch_id"])
+            if info["status"] not in TERMINAL_STATUSES:
+                continue
+            collect_shard(shard, info, work_dir, backend)
+            save_checkpoint(work_dir, state)
+            in_flight.remove(shard)
+            progressed = True
+            yield shard
+
+        if progressed:
+            delay = poll_interval
+        elif in_flight:
+            # Exponential backoff with jitter while nothing is finishing
+            time.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 2, max_poll_interval)
+
+
+def collect_shard(shard: dict, info: dict, work_dir: str, backend):
+    base = os.path.join(work_dir, f"shard-{shard['index']:05d}")
+    shard["output_paths"] = []
+    for key in ("output_file_id", "error_file_id"):
+        if info.get(key):
+            dest = f"{base}.{key.split('_')[0]}.jsonl"
+            backend.download(info[key], dest)
+            shard["output_paths"].append(dest)
+
+    if info["status"] == "completed":
+        shard["status"] = "completed"
+        print(f"✅ Shard {shard['index']} completed")
+    else:
+        shard["status"] = "failed"
+        shard["error"] = f"batch {info['status']}"
+        print(f"❌ Shard {shard['index']} {info['status']} — it will be resubmitted on resume")
+
+
+# --------------------🧵 Ordered Merge --------------------
+def shard_results(shard: dict, ids: dict) -> list[dict]:
+    start, count = shard["start"], shard["count"]
+    results = [None] * count
+    for path in shard.get("output_paths", []):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                item = json.loads(line)
+                index = index_of(item["custom_id"])
+                response = item.get("response") or {}
+                error = item.get("error")
+                if not error and response.get("status_code", 200) >= 400:
+                    error = response.get("body")
+                results[index - start] = {
+                    "index": index,
+                    "id": ids.get(str(index)),
+                    "response": None if error else response.get("body"),
+                    "error": error,
+                }
+
+    for offset, result in enumerate(results):
+        if result is None:
+            index = start + offset
+            results[offset] = {
+                "index": index,
+                "id": ids.get(str(index)),
+                "response": None,
+                "error": shard.get("error", "missing from batch output"),
+            }
+    return results
+
+
+def merge_in_order(finished, ids: dict, output_path: str) -> int:
+    """Write results in input order as soon as each next shard is available."""
+    ready = {}
+    next_shard = 0
+    written = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        for shard in finished:
+            ready[shard["index"]] = shard
+            while next_shard in ready:
+                for result in shard_results(ready.pop(next_shard), ids):
+                    out.write(json.dumps(result) + "\n")
+                    written += 1
+                out.flush()
+                next_shard += 1
+    return written
+
+
+# --------------------🚀 Entry Point --------------------
+def run_batch_job(input_path: str, output_path: str, work_dir: str,
+                  shard_size: int = 10_000, model: str = MODEL,
+                  system: str | None = None, backend=None,
+                  max_in_flight: int = 4, poll_interval: float = 10.0,
+                  max_poll_interval: float = 300.0) -> int:
+    if shard_size < 1:
+        raise ValueError(f"shard_size must be at least 1, got {shard_size}")
+    if max_in_flight < 1:
+        raise ValueError(f"max_in_flight must be at least 1, got {max_in_flight}")
+    os.makedirs(work_dir, exist_ok=True)
+    backend = backend or OpenAIBatchBackend()
+
+    state = load_checkpoint(work_dir)
+    if state and same_job(state, input_path, shard_size, model, system):
+        done = sum(s["status"] == "completed" for s in state["shards"])
+        print(f"♻️ Resuming job: {done}/{len(state['shards'])} shards already completed")
+    else:
+        state = shard_input(input_path, work_dir, shard_size, model, system)
+        save_checkpoint(work_dir, state)
+        total = sum(s["count"] for s in state["shards"])
+        print(f"✂️ Split {total} requests into {len(state['shards'])} shards")
+
+    with open(os.path.join(work_dir, "ids.json"), "r", encoding="utf-8") as f:
+        ids = json.load(f)
+
+    finished = run_shards(state, work_dir, backend, max_in_flight,
+                          poll_interval, max_poll_interval)
+    written = merge_in_order(finished, ids, output_path)
+    failed = [s["index"] for s in state["shards"] if s["status"] != "completed"]
+
+    print(f"\n📥 Wrote {written} results to {output_path}")
+    if failed:
+        print(f"⚠️ Shards {failed} did not complete; rerun the same command to retry them.")
+        return 1
+    return 0
+
+
+def main(args) -> int:
+    backend = None
+    if args.local:
+        backend = LocalBatchBackend(os.path.join(args.work_dir, "local-store"))
+    return run_batch_job(
+        args.input,
+        args.output,
+        args.work_dir,
+        shard_size=args.shard_size,
+        model=args.model,
+        system=args.system,
+        backend=backend,
+        max_in_flight=args.max_in_flight,
+        poll_interval=args.poll_interval,
+    )
@@ -0,0 +1,714 @@
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# --------------------📏 Benchmarks --------------------
+# Each bench_* function takes the parsed `gemini bench <name>` arguments and
+# returns a process exit code, so budgets can gate CI.
+
+CLI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gemini_cli.py")
+
+# Modules that must never be imported just to parse arguments
+HEAVY_MODULES = (
+    "openai",
+    "httpx",
+    "pydantic",
+    "pytz",
+    "numpy",
+    "pyttsx3",
+    "speech_recognition",
+    "websockets",
+)
+
+
+# --------------------⏱ Startup Time --------------------
+def parse_importtime(stderr: str) -> tuple[float, dict[str, int], set[str]]:
+    """Return (total self time in ms, cumulative µs per top-level module, all modules)."""
+    total_us = 0
+    top_level = {}
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        head, cumulative_us, name = line.split("|", 2)
+        total_us += int(head.split(":", 1)[1])
+        name = name[1:]  # drop the separator space; the rest is nesting
+        modules.add(name.strip())
+        if not name.startswith(" "):
+            top_level[name.strip()] = int(cumulative_us)
+    return total_us / 1000, top_level, modules
+
+
+def bench_startup(args) -> int:
+    argv = shlex.split(args.argv)
+    walls, imports, seen_heavy = [], [], set()
+    top_level = {}
+
+    print(f"⏱ Timing `gemini {args.argv}` over {args.runs} cold starts...\n")
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", CLI_PATH, *argv],
+            capture_output=True,
+            text=True,
+        )
+        walls.append((time.perf_counter() - start) * 1000)
+        if proc.returncode != 0:
+            # A crash mid-import loads fewer modules and would pass the budget
+            errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+            print(f"❌ `gemini {args.argv}` exited with code {proc.returncode}")
+            print("\n".join(errors[-15:]))
+            return 1
+        import_ms, top_level, modules = parse_importtime(proc.stderr)
+        imports.append(import_ms)
+        seen_heavy |= {m.split(".")[0] for m in modules} & set(HEAVY_MODULES)
+
+    wall_ms = statistics.median(walls)
+    import_ms = statistics.median(imports)
+    print(f"🕒 Wall time (median):    {wall_ms:8.1f} ms")
+    print(f"📦 Import time (median):  {import_ms:8.1f} ms  (budget {args.budget_ms:.1f} ms)")
+
+    print("\n🐢 Slowest top-level imports (last run):")
+    slowest = sorted(top_level.items(), key=lambda kv: kv[1], reverse=True)[:8]
+    for name, cumulative_us in slowest:
+        print(f"   {cumulative_us / 1000:8.2f} ms  {name}")
+
+    failed = False
+    if seen_heavy:
+        print(f"\n❌ Heavy modules imported at startup: {', '.join(sorted(seen_heavy))}")
+        failed = True
+    if import_ms > args.budget_ms:
+        print(f"\n❌ Import time {import_ms:.1f} ms is over the {args.budget_ms:.1f} ms budget")
+        failed = True
+    if not failed:
+        print("\n✅ Startup within budget.")
+    return 1 if failed else 0
+
+
+# --------------------🗂 History Serialization --------------------
+def synthetic_turn(turn: int) -> list[dict]:
+    call_id = f"call_{turn}"
+    return [
+        {"role": "user", "content": f"What's the weather in city number {turn}? " * 3},
+        {"role": "assistant", "content": None, "tool_calls": [{
+            "id": call_id,
+            "type": "function",
+            "function": {"name": "get_current_weather", "arguments": f'{{"location": "city {turn}"}}'},
+        }]},
+        {"role": "tool", "tool_call_id": call_id, "name": "get_current_weather",
+         "content": '{"temperature": "26°C", "condition": "Sunny"}'},
+        {"role": "assistant", "content": f"It is sunny and 26°C in city {turn}. " * 4},
+    ]
+
+
+def bench_history(args) -> int:
+    import json
+    from gemini_history import History, encode_params
+
+    params = encode_params(model="gemini-2.5-flash", tool_choice="auto",
+                           tools=[{"type": "function", "function": {"name": "t", "parameters": {}}}])
+    history = History([{"role": "system", "content": "You are a helpful assistant."}])
+    naive = list(history.to_list())
+
+    print(f"🗂 Per-turn client CPU as history grows to {args.messages} messages\n")
+    print(f"{'messages':>10} {'cached µs/turn':>16} {'json.dumps µs/turn':>20}")
+
+    rows = []
+    turn = 0
+    next_report = args.step
+    while len(history) < args.messages:
+        for message in synthetic_turn(turn):
+            history.append(message)
+            naive.append(message)
+        turn += 1
+        if len(history) < next_report:
+            continue
+        next_report += args.step
+
+        # One turn = append the new tail and build the body twice (tool round trip)
+        start = time.process_time()
+        for _ in range(args.repeat):
+            for message in synthetic_turn(turn):
+                history.append(message)
+            history.request_parts(params)
+            history.request_parts(params)
+        cached_us = (time.process_time() - start) / args.repeat * 1e6
+
+        tail = synthetic_turn(turn)
+        naive.extend(history.to_list()[len(naive):])
+        start = time.process_time()
+        for _ in range(args.repeat):
+            body = {"model": "gemini-2.5-flash", "messages": naive + tail}
+            json.dumps(body)
+            json.dumps(body)
+        naive_us = (time.process_time() - start) / args.repeat * 1e6
+
+        rows.append((len(history), cached_us, naive_us))
+        print(f"{len(history):>10} {cached_us:>16.1f} {naive_us:>20.1f}")
+
+    first, last = rows[0], rows[-1]
+    print(f"\n📈 Growth from {first[0]} to {last[0]} messages: "
+          f"cached x{last[1] / first[1]:.1f}, json.dumps x{last[2] / first[2]:.1f}")
+    return 0
+
+
+# --------------------🗺 Location Resolver --------------------
+TYPO_QUERIES = ("Lahre", "Toyko", "Berln", "Madird", "Chicgo", "new yrok", "Karchi", "Sydny", "Tokio", "Bombay")
+
+
+def bench_locations(args) -> int:
+    import gemini_locations
+
+    start = time.perf_counter()
+    index = gemini_locations.get_index()
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"🗺 Index built in {build_ms:.1f} ms ({len(index.keys)} keys)\n")
+
+    # Every 10th city name, as written in the city file
+    names = [index.exact[key].name for key in index.keys[::10]]
+    for label, queries, resolve in (
+        ("exact, uncached", names, index.resolve),
+        ("typos, uncached", TYPO_QUERIES, index.resolve),
+        ("mixed, memoized", names + list(TYPO_QUERIES), gemini_locations.resolve_location),
+    ):
+        start = time.perf_counter()
+        for i in range(args.lookups):
+            resolve(queries[i % len(queries)])
+        rate = args.lookups / (time.perf_counter() - start)
+        print(f"   {label:<18} {rate:>12,.0f} lookups/s")
+    return 0
+
+
+# --------------------🚦 Scheduler Simulation --------------------
+# tenant -> (weight, priority, requests/s, deadline s)
+SIM_TENANTS = {
+    "heavy-batch": (1.0, "batch", 12.0, 30.0),
+    "heavy-chat": (1.0, "interactive", 6.0, 4.0),
+    "voice": (2.0, "interactive", 1.5, 2.0),
+    "chat-a": (1.0, "interactive", 1.0, 4.0),
+    "chat-b": (1.0, "interactive", 1.0, 4.0),
+}
+
+
+class FifoQueue:
+    """Baseline: one shared first-come-first-served queue, no shedding."""
+
+    def __init__(self):
+        self.jobs = []
+        self.shed = []
+
+    def push(self, job, now, slot_wait=0.0):
+        self.jobs.append(job)
+        return True
+
+    def pop(self, now):
+        return self.jobs.pop(0) if self.jobs else None
+
+    def drain_shed(self):
+        return []
+
+
+def max_min_fair(demand: dict[str, float], weights: dict[str, float], capacity: float) -> dict[str, float]:
+    """Weighted max-min fair share of `capacity` (water-filling)."""
+    share, remaining, left = {}, dict(demand), capacity
+    while remaining and left > 1e-9:
+        total_weight = sum(weights[t] for t in remaining)
+        unit = left / total_weight
+        satisfied = {t: d for t, d in remaining.items() if d <= unit * weights[t]}
+        if not satisfied:
+            for t in remaining:
+                share[t] = unit * weights[t]
+            return share
+        for t, d in satisfied.items():
+            share[t] = d
+            left -= d
+            del remaining[t]
+    for t in remaining:
+        share[t] = 0.0
+    return share
+
+
+def simulate(queue, args, seed: int) -> dict[str, dict]:
+    import heapq
+    import random
+    from gemini_scheduler import Job
+
+    rng = random.Random(seed)
+    events = []  # (time, order, kind, job)
+    order = 0
+    for tenant, (weight, priority, rate, deadline) in SIM_TENANTS.items():
+        t = 0.0
+        while True:
+            t += rng.expovariate(rate)
+            if t > args.duration:
+                break
+            job = Job(tenant, priority, t + deadline, args.service, t)
+            job.payload = rng.expovariate(1 / args.service)  # actual service time
+            events.append((t, order, "arrive", job))
+            order += 1
+    heapq.heapify(events)
+
+    stats = {t: {"offered": 0, "done": 0, "shed": 0, "met": 0, "work": 0.0, "latencies": []}
+             for t in SIM_TENANTS}
+    free = args.servers
+    running = {}  # job -> finish time the scheduler expects (it can't see payload)
+
+    def start_jobs(now):
+        nonlocal free, order
+        while free:
+            job = queue.pop(now)
+            if job is None:
+                break
+            free -= 1
+            order += 1
+            running[job] = now + job.cost
+            heapq.heappush(events, (now + job.payload, order, "finish", job))
+        for job in queue.drain_shed():
+            stats[job.tenant]["shed"] += 1
+
+    while events:
+        now, _, kind, job = heapq.heappop(events)
+        if kind == "arrive":
+            stats[job.tenant]["offered"] += 1
+            slot_wait = 0.0 if free else max(0.0, min(running.values()) - now)
+            queue.push(job, now, slot_wait)
+        else:
+            free += 1
+            del running[job]
+            s = stats[job.tenant]
+            s["done"] += 1
+            s["work"] += job.payload
+            s["latencies"].append(now - job.arrival)
+            s["met"] += now <= job.deadline
+        start_jobs(now)
+    return stats
+
+
+def bench_scheduler(args) -> int:
+    from gemini_scheduler import PRIORITY_CLASSES, FairQueue
+
+    weights = {t: spec[0] for t, spec in SIM_TENANTS.items()}
+    offered_load = sum(spec[2] for spec in SIM_TENANTS.values()) * args.service / args.servers
+    print(f"🚦 {args.servers} upstream slots, mean service {args.service}s, "
+          f"offered load {offered_load:.0%} of capacity, {args.duration:.0f}s simulated\n")
+
+    # Fair share honours strict priority: batch only gets what interactive leaves
+    fair, left = {}, float(args.servers)
+    for priority in PRIORITY_CLASSES:
+        demand = {t: spec[2] * args.service for t, spec in SIM_TENANTS.items() if spec[1] == priority}
+        share = max_min_fair(demand, weights, left)
+        left -= sum(share.values())
+        fair.update(share)
+
+    for label, queue in (("FIFO (no scheduler)", FifoQueue()),
+                         ("Fair queue + EDF + shedding", FairQueue(weights, capacity=args.servers))):
+        stats = simulate(queue, args, args.seed)
+        print(f"── {label}")
+        print(f"   {'tenant':<12} {'offered':>8} {'done':>6} {'shed':>6} {'met %':>7} {'p50 s':>7} {'p95 s':>7} {'share':>7}")
+        normalized = []
+        for tenant, s in stats.items():
+            lat = sorted(s["latencies"]) or [0.0]
+            p50 = lat[len(lat) // 2]
+            p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))]
+            met = 100 * s["met"] / s["offered"] if s["offered"] else 0.0
+            # Goodput (work finished within deadline) relative to the max-min fair share
+            goodput = s["work"] * (s["met"] / s["done"] if s["done"] else 0) / args.duration
+            normalized.append(goodput / fair[tenant] if fair[tenant] else 1.0)
+            print(f"   {tenant:<12} {s['offered']:>8} {s['done']:>6} {s['shed']:>6} "
+                  f"{met:>6.1f}% {p50:>7.2f} {p95:>7.2f} {normalized[-1]:>6.2f}x")
+        jain = sum(normalized) ** 2 / (len(normalized) * sum(x * x for x in normalized))
+        print(f"   Jain fairness of goodput vs. fair share: {jain:.3f}\n")
+    return 0
+
+
+# --------------------🧰 Tool Selection --------------------
+TOOL_DOMAINS = {
+    "weather": ("forecast", "alert", "air quality"),
+    "calendar": ("event", "meeting", "reminder"),
+    "email": ("message", "draft", "attachment"),
+    "billing": ("invoice", "payment", "refund"),
+    "travel": ("flight", "hotel booking", "rental car"),
+    "finance": ("stock quote", "portfolio", "exchange rate"),
+    "github": ("pull request", "issue", "repository"),
+    "jira": ("ticket", "sprint", "epic"),
+    "slack": ("channel", "thread", "user status"),
+    "music": ("playlist", "song", "album"),
+    "maps": ("route", "place", "traffic report"),
+    "translate": ("document", "phrase", "glossary"),
+    "news": ("headline", "article", "topic feed"),
+    "recipes": ("recipe", "shopping list", "meal plan"),
+    "fitness": ("workout", "step count", "sleep record"),
+    "database": ("table", "query", "backup"),
+    "crm": ("contact", "lead", "deal"),
+    "storage": ("file", "folder", "share link"),
+    "smart home": ("thermostat", "light", "door lock"),
+    "support": ("case", "knowledge article", "survey"),
+    "hr": ("employee record", "leave request", "payslip"),
+    "shipping": ("parcel", "label", "pickup"),
+    "ads": ("campaign", "budget", "audience"),
+    "video": ("meeting recording", "transcript", "webinar"),
+    "security": ("access key", "audit log", "alert rule"),
+}
+TOOL_ACTIONS = {
+    "get": "Get details of a",
+    "list": "List every",
+    "create": "Create a new",
+    "update": "Update an existing",
+    "delete": "Delete a",
+    "search": "Search for a",
+    "summarize": "Summarize a",
+}
+QUERY_TEMPLATES = {
+    "get": "show me the {obj} from {domain}",
+    "list": "what {obj}s do I have in {domain}",
+    "create": "please make a new {obj} in {domain}",
+    "update": "change my {obj} in {domain}",
+    "delete": "remove that {obj} from {domain}",
+    "search": "find a {obj} in {domain} about the launch",
+    "summarize": "give me a short summary of the {obj} in {domain}",
+}
+# How a user might ask without reusing the tool's own words
+PARAPHRASE_TEMPLATES = {
+    "get": "pull up the {thing}",
+    "list": "what are all the {thing} entries i have",
+    "create": "set up a fresh {thing}",
+    "update": "edit the {thing}",
+    "delete": "trash the {thing}",
+    "search": "look for a {thing} mentioning the launch",
+    "summarize": "give me the gist of the {thing}",
+}
+PARAPHRASES = {
+    "forecast": "outlook for rain tomorrow",
+    "alert": "storm warning",
+    "air quality": "smog levels downtown",
+    "event": "appointment on my agenda",
+    "meeting": "sync with the team on thursday",
+    "reminder": "nudge to call mom later",
+    "message": "note in my inbox from Priya",
+    "draft": "unsent letter to the landlord",
+    "attachment": "pdf enclosed in that mail",
+    "invoice": "bill we sent the client",
+    "payment": "money transferred to the vendor",
+    "refund": "money back for the returned shoes",
+    "flight": "plane ticket to Denver",
+    "hotel booking": "room reservation in Lisbon",
+    "rental car": "vehicle hire at the airport",
+    "stock quote": "share price of Apple",
+    "portfolio": "investment holdings",
+    "exchange rate": "euro to dollar conversion",
+    "pull request": "code change awaiting review on our code host",
+    "issue": "bug report on our code host",
+    "repository": "source tree on our code host",
+    "ticket": "work item in the tracker",
+    "sprint": "two-week iteration in the tracker",
+    "epic": "large initiative in the tracker backlog",
+    "channel": "team chat room",
+    "thread": "reply chain under that chat post",
+    "user status": "whether Sam is away in chat",
+    "playlist": "mix of tracks I saved",
+    "song": "tune that is playing",
+    "album": "record by that band",
+    "route": "directions to the airport",
+    "place": "coffee shop nearby",
+    "traffic report": "congestion on the highway",
+    "document": "contract rendered from Spanish into English",
+    "phrase": "way to say good morning in French",
+    "glossary": "table of term equivalents between languages",
+    "headline": "top story today",
+    "article": "piece from the morning paper",
+    "topic feed": "stream of stories about AI",
+    "recipe": "instructions to cook lasagna",
+    "shopping list": "groceries to buy",
+    "meal plan": "dinners for the week",
+    "workout": "gym session",
+    "step count": "distance I walked today",
+    "sleep record": "how long I slept last night",
+    "table": "rows in the customers relation",
+    "query": "SQL I ran against the warehouse",
+    "backup": "snapshot of the db",
+    "contact": "person in our sales system",
+    "lead": "prospect who filled in the signup form",
+    "deal": "opportunity in the sales pipeline",
+    "file": "pdf in my drive",
+    "folder": "directory in my drive",
+    "share link": "url that gives a colleague access",
+    "thermostat": "heating temperature at home",
+    "light": "lamps in the living room",
+    "door lock": "front entrance bolt",
+    "case": "customer complaint",
+    "knowledge article": "help center doc",
+    "survey": "satisfaction questionnaire",
+    "employee record": "staff profile for Dana",
+    "leave request": "vacation days application",
+    "payslip": "salary statement",
+    "parcel": "package coming from the warehouse",
+    "label": "postage sticker",
+    "pickup": "courier collection",
+    "campaign": "promotion running on social",
+    "budget": "spend cap for promotions",
+    "audience": "targeting segment for promotions",
+    "meeting recording": "saved zoom call",
+    "transcript": "text of what was said on the call",
+    "webinar": "online seminar",
+    "access key": "api credential",
+    "audit log": "trail of who logged in",
+    "alert rule": "notification threshold for suspicious logins",
+}
+
+
+def synthetic_tools() -> list[tuple[dict, str, str]]:
+    """(tool, query worded like the tool, paraphrased query) for every tool."""
+    registry = []
+    for domain, objects in TOOL_DOMAINS.items():
+        for obj in objects:
+            for action, phrase in TOOL_ACTIONS.items():
+                name = f"{action}_{domain}_{obj}".replace(" ", "_")
+                tool = {
+                    "type": "function",
+                    "function": {
+                        "name": name,
+                        "description": f"{phrase} {obj} in the {domain} service.",
+                        "parameters": {
+                            "type": "object",
+                            "properties": {
+                                "id": {"type": "string", "description": f"The {obj} identifier"},
+                                "query": {"type": "string", "description": "Free-text filter"},
+                            },
+                            "required": [],
+                        },
+                    },
+                }
+                registry.append((
+                    tool,
+                    QUERY_TEMPLATES[action].format(obj=obj, domain=domain),
+                    PARAPHRASE_TEMPLATES[action].format(thing=PARAPHRASES[obj]),
+                ))
+    return registry
+
+
+def bench_tools(args) -> int:
+    import random
+    from gemini_tool_selector import ToolSelector
+
+    registry = synthetic_tools()[:args.tools]
+    tools = [tool for tool, _, _ in registry]
+
+    start = time.perf_counter()
+    selector = ToolSelector(tools, k=args.k, pinned=[tools[0]["function"]["name"]])
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"🧰 {len(tools)} tools embedded in {build_ms:.1f} ms "
+          f"({selector.matrix.shape[1]}-dim, {selector.matrix.nbytes / 1024:.0f} KiB)\n")
+
+    # Literal queries reuse the tool's own words; paraphrased ones are closer
+    # to what users actually type. A hit counts when the tool was sent, either
+    # in the top-k or because nothing scored MIN_SCORE and the full list went.
+    for label, column in (("worded like the tool", 1), ("paraphrased", 2)):
+        selector.stats.update(selections=0, full_lists=0, tokens_full=0, tokens_sent=0,
+                              select_seconds=0.0)
+        rng = random.Random(args.seed)
+        hits, top_k_hits, latencies = 0, 0, []
+        for _ in range(args.queries):
+            entry = rng.choice(registry)
+            messages = [
+                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "user", "content": entry[column]},
+            ]
+            start = time.perf_counter()
+            chosen = selector.select(messages)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += entry[0] in chosen
+            top_k_hits += entry[0] in chosen and len(chosen) < len(tools)
+
+        latencies.sort()
+        stats = selector.stats
+        print(f"   Queries {label}:")
+        print(f"     Tool sent:                 {100 * hits / args.queries:.1f}%")
+        print(f"       in the top-{args.k} (+1 pinned): {100 * top_k_hits / args.queries:.1f}%")
+        print(f"     Full list sent:            {100 * stats['full_lists'] / args.queries:.1f}%")
+        print(f"     Tool tokens saved:         {100 * (1 - stats['tokens_sent'] / stats['tokens_full']):.0f}%")
+        print(f"     Selection latency p50/p95: {latencies[len(latencies) // 2]:.3f} / "
+              f"{latencies[int(len(latencies) * 0.95)]:.3f} ms")
+    return 0
+
+
+# --------------------🎙️ Voice Latency --------------------
+def synthetic_utterance(sample_rate: int, seconds: float = 1.5) -> "np.ndarray":
+    import numpy as np
+
+    # Syllable-rate bursts of noise are enough to drive the energy VAD
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0.2, 1.0)
+    noise = np.random.default_rng(0).standard_normal(len(t))
+    return (6000 * envelope * noise).clip(-32768, 32767).astype(np.int16)
+
+
+def trim_silence(audio: "np.ndarray", sample_rate: int, frame_ms: int = 20) -> "np.ndarray":
+    import numpy as np
+
+    frame = sample_rate * frame_ms // 1000
+    usable = len(audio) - len(audio) % frame
+    rms = np.sqrt(np.mean(audio[:usable].reshape(-1, frame).astype(np.float32) ** 2, axis=1))
+    voiced = np.flatnonzero(rms > max(300.0, 0.1 * rms.max(initial=0.0)))
+    if not len(voiced):
+        return audio[:0]
+    return audio[voiced[0] * frame:(voiced[-1] + 1) * frame]
+
+
+async def voice_client_turn(url: str, audio, barge_in: bool) -> dict:
+    """Stream one utterance in real time; time the replies from the end of speech."""
+    import asyncio
+    import json
+    import numpy as np
+    from websockets.asyncio.client import connect
+    from gemini_voice_server import FRAME_MS, MAX_MESSAGE, mulaw_encode
+
+    result = {}
+    async with connect(url, compression=None, max_size=MAX_MESSAGE) as ws:
+        ready = json.loads(await ws.recv())
+        frame = ready["sample_rate"] * FRAME_MS // 1000
+        frames = [mulaw_encode(audio[i:i + frame]) for i in range(0, len(audio), frame)]
+        silence = mulaw_encode(np.zeros(frame, dtype=np.int16))
+        first_audio, finished = asyncio.Event(), asyncio.Event()
+        last_turn = 2 if barge_in else 1
+
+        async def send_paced(chunks):
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            for i, chunk in enumerate(chunks):
+                await asyncio.sleep(max(0.0, start + i * FRAME_MS / 1000 - loop.time()))
+                await ws.send(chunk)
+
+        async def sender():
+            await send_paced(frames)
+            result["speech_end"] = time.perf_counter()
+            # Keep the mic "open" with silence so the server VAD can end the turn
+            keep_talking = asyncio.ensure_future(send_paced([silence] * 1500))
+            if barge_in:
+                await first_audio.wait()
+                keep_talking.cancel()
+                result["barge_in"] = time.perf_counter()
+                await send_paced(frames)
+                keep_talking = asyncio.ensure_future(send_paced([silence] * 1500))
+            await finished.wait()
+            keep_talking.cancel()
+
+        async def receiver():
+            async for message in ws:
+                now = time.perf_counter()
+                if isinstance(message, bytes):
+                    if "first_audio" not in result:
+                        result["first_audio"] = now
+                        first_audio.set()
+                    continue
+                event = json.loads(message)
+                kind = event["type"]
+                if kind == "transcript" and event["turn"] == 1:
+                    result["transcript"] = now
+                elif kind == "reply" and event["turn"] == 1:
+                    result.setdefault("first_token", now)
+                elif kind == "interrupted":
+                    result["interrupted"] = now
+                elif kind == "error":
+                    result["error"] = event["error"]
+                    finished.set()
+                elif kind == "done":
+                    if event["turn"] == 1:
+                        result["server"] = event["timings"]
+                    if event["turn"] == last_turn:
+                        finished.set()
+                if finished.is_set():
+                    return
+
+        await asyncio.wait_for(asyncio.gather(sender(), receiver()), timeout=60)
+    return result
+
+
+async def run_voice_bench(args) -> tuple[list[dict], list[str]]:
+    import asyncio
+    import random
+    from gemini_voice_server import SAMPLE_RATE, LocalVoiceBackend, VoiceServer, load_audio
+
+    clips = [trim_silence(load_audio(path, SAMPLE_RATE), SAMPLE_RATE) for path in args.wav]
+    clips = [clip for clip in clips if len(clip)] or [synthetic_utterance(SAMPLE_RATE)]
+
+    server = backend = None
+    url = args.url
+    if not url:
+        if args.local:
+            backend = LocalVoiceBackend()
+        else:
+            from gemini_voice_server import GeminiVoiceBackend
+
+            backend = GeminiVoiceBackend(tts_workers=args.tts_workers)
+        server = await VoiceServer(backend, max_sessions=args.sessions).start("127.0.0.1", 0)
+        url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+    rng = random.Random(args.seed)
+
+    async def session(i: int):
+        # Stagger arrivals so sessions don't all speak in lockstep
+        await asyncio.sleep(rng.uniform(0, args.ramp))
+        return await voice_client_turn(url, clips[i % len(clips)], args.barge_in)
+
+    try:
+        outcomes = await asyncio.gather(*(session(i) for i in range(args.sessions)),
+                                        return_exceptions=True)
+    finally:
+        if server:
+            server.close()
+            await server.wait_closed()
+        if backend:
+            backend.close()
+
+    results, errors = [], []
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            errors.append(f"{type(outcome).__name__}: {outcome}")
+        elif "error" in outcome:
+            errors.append(outcome["error"])
+        else:
+            results.append(outcome)
+    return results, errors
+
+
+def bench_voice(args) -> int:
+    import asyncio
+
+    backend = "remote" if args.url else ("local stand-in" if args.local else "Gemini")
+    source = f"{len(args.wav)} WAV file(s)" if args.wav else "a synthetic utterance"
+    print(f"🎙️ {args.sessions} concurrent voice sessions against the {backend} backend, "
+          f"streaming {source} in real time\n")
+    started = time.perf_counter()
+    results, errors = asyncio.run(run_voice_bench(args))
+    print(f"   {len(results)} sessions completed in {time.perf_counter() - started:.1f}s, "
+          f"{len(errors)} failed\n")
+
+    def row(label: str, values: list[float]):
+        if not values:
+            return
+        values.sort()
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        print(f"   {label:<34} {statistics.median(values):>8.0f} {p95:>8.0f} {values[-1]:>8.0f}")
+
+    print(f"   {'latency (ms)':<34} {'p50':>8} {'p95':>8} {'max':>8}")
+    for key, label in (("transcript", "end of speech → transcript"),
+                       ("first_token", "end of speech → first reply text"),
+                       ("first_audio", "end of speech → first reply audio")):
+        row(label, [(r[key] - r["speech_end"]) * 1000 for r in results if key in r])
+    for key, label in (("transcript_ms", "server: utterance → transcript"),
+                       ("first_token_ms", "server: utterance → first token"),
+                       ("first_audio_ms", "server: utterance → first audio")):
+        row(label, [r["server"][key] for r in results if key in r.get("server", {})])
+    row("barge-in → interrupted", [(r["interrupted"] - r["barge_in"]) * 1000
+                                   for r in results if "interrupted" in r and "barge_in" in r])
+
+    for error in errors[:5]:
+        print(f"\n❌ {error}")
+    return 1 if errors else 0
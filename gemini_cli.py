@@ -0,0 +1,212 @@
+import argparse
+import importlib
+import sys
+
+# --------------------🧭 Unified Gemini CLI --------------------
+# Every subcommand points at a "module:function" target that is only imported
+# once the subcommand runs, so `--help` and unrelated commands never pay for
+# openai, pydantic, pytz or the audio stack.
+
+
+def run_target(target: str, *args):
+    module_name, func_name = target.split(":")
+    func = getattr(importlib.import_module(module_name), func_name)
+    return func(*args)
+
+
+# --------------------💬 Subcommand Handlers --------------------
+def cmd_chat(args):
+    if args.once:
+        return run_target("basic:main")
+    return run_target("gemini_multi_turn_chat:chat_loop")
+
+
+def cmd_stream(args):
+    if args.tools:
+        return run_target("gemini_streaming_tool_call:main")
+    return run_target("gemini_streaming:chat_stream", args.prompt)
+
+
+def cmd_tools(args):
+    if args.single:
+        return run_target("gemini_function_call:main")
+    return run_target("gemini_multi_tool_call:main")
+
+
+def cmd_structured(args):
+    if args.with_tools:
+        return run_target("gemini_tool_structured_output:main")
+    return run_target("gemini_structured:main")
+
+
+def cmd_extract(args):
+    return run_target("gemini_extract:main", args)
+
+
+def cmd_voice(args):
+    if args.serve:
+        return run_target("gemini_voice_server:main", args)
+    return run_target("gemini_voice_client:main")
+
+
+def cmd_serve(args):
+    weights = {}
+    for item in args.weight:
+        tenant, _, weight = item.partition("=")
+        weights[tenant] = float(weight)
+    return run_target("gemini_gateway:serve", args.host, args.port, args.concurrency, weights)
+
+
+def cmd_batch(args):
+    return run_target("gemini_batch:main", args)
+
+
+def cmd_bench(args):
+    return run_target(args.bench_target, args)
+
+
+# --------------------🛠 Argument Parser --------------------
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="gemini",
+        description="Gemini chat completion examples behind one fast-starting CLI.",
+    )
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile each pipeline stage (time, allocations, flamegraph)")
+    parser.add_argument("--profile-dir", default="profile", help="Where --profile writes its report")
+    parser.add_argument("--profile-interval", type=float, default=0.005,
+                        help="Stack sampling interval in seconds")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("chat", help="Multi-turn chat with tools and memory")
+    p.add_argument("--once", action="store_true", help="Ask a single question and exit")
+    p.set_defaults(handler=cmd_chat)
+
+    p = sub.add_parser("stream", help="Stream a response token by token")
+    p.add_argument("prompt", nargs="?", default="Tell me a story about a clever cat.")
+    p.add_argument("--tools", action="store_true", help="Stream with tool calling enabled")
+    p.set_defaults(handler=cmd_stream)
+
+    p = sub.add_parser("tools", help="Function calling with weather and time tools")
+    p.add_argument("--single", action="store_true", help="Use the single weather tool flow")
+    p.set_defaults(handler=cmd_tools)
+
+    p = sub.add_parser("structured", help="JSON-schema structured output")
+    p.add_argument("--with-tools", action="store_true", help="Call a tool before structuring")
+    p.set_defaults(handler=cmd_structured)
+
+    p = sub.add_parser("extract", help="Map-reduce structured extraction over a large document")
+    p.add_argument("input", help="Text file to extract records from")
+    p.add_argument("--schema", default="gemini_structured:WeatherInfo",
+                   help="Pydantic model as module:Class")
+    p.add_argument("--key", action="append", default=[], metavar="FIELD",
+                   help="Field to dedupe records on (repeatable, default: all fields)")
+    p.add_argument("--output", help="Write records as JSONL here instead of stdout")
+    p.add_argument("--chunk-tokens", type=int, default=3000)
+    p.add_argument("--overlap", type=int, default=200, help="Tokens shared by neighbouring chunks")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--retries", type=int, default=3)
+    p.add_argument("--model", default="gemini-2.5-flash")
+    p.set_defaults(handler=cmd_extract)
+
+    p = sub.add_parser("voice", help="Voice assistant (local microphone, or a websocket server)")
+    p.add_argument("--serve", action="store_true", help="Host remote voice sessions over websockets")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--max-sessions", type=int, default=64)
+    p.add_argument("--tts-workers", type=int, default=2, help="Speech synthesis processes")
+    p.add_argument("--model", default="gemini-2.5-flash")
+    p.add_argument("--local", action="store_true", help="Serve the offline stand-in backend")
+    p.set_defaults(handler=cmd_voice)
+
+    p = sub.add_parser("serve", help="Run the OpenAI-compatible chat gateway")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--concurrency", type=int, default=8, help="Upstream calls in flight")
+    p.add_argument("--weight", action="append", default=[], metavar="TENANT=W",
+                   help="Fair-share weight for a tenant (repeatable, default 1)")
+    p.set_defaults(handler=cmd_serve)
+
+    p = sub.add_parser("batch", help="Offline bulk job through the batch endpoint")
+    p.add_argument("input", help="JSONL with one {'prompt': ...} or {'messages': [...]} per line")
+    p.add_argument("output", help="JSONL results, written in input order")
+    p.add_argument("--work-dir", default="batch_work", help="Shards and checkpoint (reuse to resume)")
+    p.add_argument("--shard-size", type=int, default=10_000)
+    p.add_argument("--model", default="gemini-2.5-flash")
+    p.add_argument("--system", help="System prompt added to plain 'prompt' lines")
+    p.add_argument("--max-in-flight", type=int, default=4, help="Batches submitted at once")
+    p.add_argument("--poll-interval", type=float, default=10.0, help="Initial poll delay in seconds")
+    p.add_argument("--local", action="store_true", help="Use the in-process batch stand-in")
+    p.set_defaults(handler=cmd_batch)
+
+    p = sub.add_parser("bench", help="Run a benchmark")
+    benches = p.add_subparsers(dest="bench", required=True)
+
+    b = benches.add_parser("startup", help="Cold-start import time with a regression budget")
+    b.add_argument("--runs", type=int, default=5)
+    b.add_argument("--budget-ms", type=float, default=60.0,
+                   help="Fail if median total import time exceeds this")
+    b.add_argument("--argv", default="--help",
+                   help="CLI arguments to time, e.g. 'chat --help'")
+    b.set_defaults(bench_target="gemini_bench:bench_startup")
+
+    b = benches.add_parser("history", help="Per-turn request-body cost as history grows")
+    b.add_argument("--messages", type=int, default=5000)
+    b.add_argument("--step", type=int, default=500)
+    b.add_argument("--repeat", type=int, default=20)
+    b.set_defaults(bench_target="gemini_bench:bench_history")
+
+    b = benches.add_parser("locations", help="City/timezone resolver build time and lookup rate")
+    b.add_argument("--lookups", type=int, default=20_000)
+    b.set_defaults(bench_target="gemini_bench:bench_locations")
+
+    b = benches.add_parser("scheduler", help="Simulated multi-tenant overload: FIFO vs. fair queueing")
+    b.add_argument("--servers", type=int, default=8, help="Concurrent upstream slots")
+    b.add_argument("--service", type=float, default=1.0, help="Mean upstream latency in seconds")
+    b.add_argument("--duration", type=float, default=600.0, help="Simulated seconds")
+    b.add_argument("--seed", type=int, default=7)
+    b.set_defaults(bench_target="gemini_bench:bench_scheduler")
+
+    b = benches.add_parser("tools", help="Tool-subset selection recall, latency and token savings")
+    b.add_argument("--tools", type=int, default=525, help="Synthetic registry size")
+    b.add_argument("--k", type=int, default=8)
+    b.add_argument("--queries", type=int, default=2000)
+    b.add_argument("--seed", type=int, default=7)
+    b.set_defaults(bench_target="gemini_bench:bench_tools")
+
+    b = benches.add_parser("voice", help="End-to-end voice latency over websockets, driven by WAV files")
+    b.add_argument("wav", nargs="*", help="Utterances to stream (default: a synthetic one)")
+    b.add_argument("--url", help="Existing voice server (default: start one in-process)")
+    b.add_argument("--sessions", type=int, default=8, help="Concurrent sessions")
+    b.add_argument("--ramp", type=float, default=1.0, help="Spread session starts over this many seconds")
+    b.add_argument("--barge-in", action="store_true", help="Talk over the first reply and time the cut-off")
+    b.add_argument("--tts-workers", type=int, default=2)
+    b.add_argument("--local", action="store_true", help="Use the offline stand-in backend in-process")
+    b.add_argument("--seed", type=int, default=7)
+    b.set_defaults(bench_target="gemini_bench:bench_voice")
+
+    p.set_defaults(handler=cmd_bench)
+    return parser
+
+
+# --------------------🚀 Entry Point --------------------
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if not args.profile:
+        result = args.handler(args)
+        return result if isinstance(result, int) else 0
+
+    import gemini_profile
+
+    gemini_profile.enable(args.profile_dir, args.profile_interval)
+    try:
+        result = args.handler(args)
+    except KeyboardInterrupt:
+        result = 130
+    finally:
+        gemini_profile.disable()
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
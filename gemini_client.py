@@ -0,0 +1,114 @@
+import os
+import random
+import time
+from functools import lru_cache
+from gemini_profile import stage
+
+# --------------------⚙️ Shared Settings --------------------
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+MODEL = "gemini-2.5-flash"
+
+# Retried like the SDK does: rate limits, timeouts and server errors
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+MAX_RETRIES = 2
+
+
+# --------------------🔐 Load API Key --------------------
+def get_api_key() -> str:
+    # dotenv is only imported once a command actually needs the key
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("❌ GEMINI_API_KEY not found in .env file.")
+    return api_key
+
+
+# --------------------🤖 Lazy Gemini Client --------------------
+@lru_cache(maxsize=1)
+def get_client():
+    """Build the OpenAI-compatible Gemini client on first use and reuse it."""
+    from openai import OpenAI
+
+    return OpenAI(api_key=get_api_key(), base_url=GEMINI_BASE_URL)
+
+
+@lru_cache(maxsize=1)
+def get_async_client():
+    """asyncio counterpart of get_client(), for servers running many sessions."""
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=get_api_key(), base_url=GEMINI_BASE_URL)
+
+
+# --------------------📨 Pre-serialized Requests --------------------
+@lru_cache(maxsize=1)
+def get_http():
+    """Plain HTTP client for callers that build request bodies themselves."""
+    import httpx
+
+    return httpx.Client(
+        base_url=GEMINI_BASE_URL,
+        headers={
+            "Authorization": f"Bearer {get_api_key()}",
+            "Content-Type": "application/json",
+        },
+        timeout=httpx.Timeout(600.0, connect=10.0),
+    )
+
+
+class ChatCompletionError(RuntimeError):
+    """A chat completion failed for good; carries the status and error body."""
+
+    def __init__(self, message: str, status: int | None = None, body: str = ""):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+
+def retry_delay(response, attempt: int) -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.replace(".", "", 1).isdigit():
+        return min(float(retry_after), 60.0)
+    return min(8.0, 0.5 * 2 ** attempt) * random.uniform(0.75, 1.25)
+
+
+def post_chat_completion(body: bytes | list[bytes], retries: int = MAX_RETRIES) -> dict:
+    """POST an already-encoded chat completion body and return the JSON reply.
+
+    Skips the SDK's per-call validation and re-serialization of `messages`,
+    which grows with history length. `body` may be a list of fragments; they
+    are written to the socket in turn instead of being joined first.
+
+    Like the SDK, 429/5xx responses and connection errors are retried with
+    backoff; anything else raises ChatCompletionError with the error body.
+    """
+    import httpx
+
+    parts = [body] if isinstance(body, bytes) else body
+    length = sum(len(part) for part in parts)
+    for attempt in range(retries + 1):
+        response = None
+        try:
+            with stage("network"):
+                # A fresh iterator per attempt, so the fragments can be re-sent
+                response = get_http().post(
+                    "chat/completions",
+                    content=iter(parts),
+                    headers={"Content-Length": str(length)},
+                )
+        except httpx.TransportError as e:
+            if attempt == retries:
+                raise ChatCompletionError(f"Connection to Gemini failed: {e}") from e
+        else:
+            if response.is_success:
+                with stage("json"):
+                    return response.json()
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                raise ChatCompletionError(
+                    f"Gemini returned HTTP {response.status_code}: {response.text[:500]}",
+                    status=response.status_code,
+                    body=response.text,
+                )
+        time.sleep(retry_delay(response, attempt))
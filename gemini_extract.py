@@ -0,0 +1,294 @@
+import codecs
+import importlib
+import mmap
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import NamedTuple
+from gemini_client import MODEL, get_client
+from pydantic import BaseModel, create_model
+
+# --------------------📚 Map-Reduce Structured Extraction --------------------
+# Pulls Pydantic-schema records out of documents far larger than one request
+# should carry:
+#
+#   read    stream the file in blocks (memory-mapped above MMAP_THRESHOLD)
+#   split   overlapping, token-bounded chunks, cut at paragraph/sentence ends
+#   map     json_schema extraction per chunk, run concurrently with retries
+#   reduce  validate, then merge duplicates by the schema's key fields
+#
+# Only a bounded number of chunks is ever held in memory or in flight.
+# Progress and diagnostics go to stderr so stdout carries only JSONL records.
+
+MMAP_THRESHOLD = 64 * 1024 * 1024
+BLOCK_SIZE = 256 * 1024
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+PROGRESS_INTERVAL = 0.5
+
+SYSTEM_PROMPT = (
+    "You extract structured records from an excerpt of a larger document. "
+    "Return every {name} record stated in the excerpt, using only facts from "
+    "the text. Return an empty list if there are none."
+)
+
+
+# --------------------📖 Streaming Reader --------------------
+class ReadProgress:
+    __slots__ = ("bytes_read", "total_bytes")
+
+    def __init__(self, total_bytes: int):
+        self.bytes_read = 0
+        self.total_bytes = total_bytes
+
+
+def iter_text(path: str, progress: ReadProgress, block_size: int = BLOCK_SIZE):
+    """Yield decoded text blocks; multi-byte characters may straddle blocks."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(path, "rb") as f:
+        if progress.total_bytes >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for start in range(0, len(mapped), block_size):
+                    block = mapped[start:start + block_size]
+                    progress.bytes_read += len(block)
+                    yield decoder.decode(block)
+        else:
+            while block := f.read(block_size):
+                progress.bytes_read += len(block)
+                yield decoder.decode(block)
+    yield decoder.decode(b"", final=True)
+
+
+# --------------------✂️ Chunking --------------------
+class Chunk(NamedTuple):
+    index: int
+    offset: int     # character offset into the document
+    text: str
+    tokens: int
+
+
+def find_cut(buffer: str, starts: list[int], ends: list[int], max_tokens: int) -> int:
+    """Character position to end a chunk at, preferring natural boundaries."""
+    lo, hi = starts[int(max_tokens * 0.8)], ends[max_tokens - 1]
+    for boundary in ("\n\n", "\n", ". ", "? ", "! "):
+        pos = buffer.rfind(boundary, lo, hi)
+        if pos != -1:
+            return pos + len(boundary)
+    return hi
+
+
+def iter_chunks(blocks, max_tokens: int = 3000, overlap_tokens: int = 200):
+    """Split streamed text into chunks of at most `max_tokens` approximate tokens.
+
+    Consecutive chunks share about `overlap_tokens` tokens so records that
+    straddle a cut are seen whole at least once; the reducer dedupes them.
+    """
+    if not 0 <= overlap_tokens < max_tokens // 2:
+        raise ValueError("overlap_tokens must be less than half of max_tokens")
+
+    buffer, offset, index = "", 0, 0
+    for block in blocks:
+        buffer += block
+        while True:
+            starts, ends = [], []
+            for match in TOKEN_RE.finditer(buffer):
+                starts.append(match.start())
+                ends.append(match.end())
+                if len(starts) > max_tokens:
+                    break
+            if len(starts) <= max_tokens:
+                break  # need more text
+
+            cut = find_cut(buffer, starts, ends, max_tokens)
+            taken = sum(1 for s in starts if s < cut)
+            yield Chunk(index, offset, buffer[:cut], taken)
+            index += 1
+
+            resume = starts[max(taken - overlap_tokens, 1)]
+            buffer = buffer[resume:]
+            offset += resume
+
+    tokens = len(TOKEN_RE.findall(buffer))
+    if tokens:
+        yield Chunk(index, offset, buffer, tokens)
+
+
+# --------------------🧩 Schema-Aware Reducer --------------------
+def normalize_key(value):
+    if isinstance(value, str):
+        return " ".join(value.casefold().split())
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize_key(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, normalize_key(v)) for k, v in value.items()))
+    return value
+
+
+class RecordReducer:
+    """Merge validated records, deduping on `key_fields` (default: every field).
+
+    A duplicate fills in fields the first copy left empty and unions list
+    fields; records keep the order in which they appear in the document.
+    """
+
+    def __init__(self, schema: type[BaseModel], key_fields: list[str] | None = None):
+        fields = list(schema.model_fields)
+        unknown = set(key_fields or ()) - set(fields)
+        if unknown:
+            raise ValueError(f"{schema.__name__} has no fields {sorted(unknown)}")
+        self.schema = schema
+        self.key_fields = key_fields or fields
+        self.records: dict[tuple, tuple[tuple[int, int], dict]] = {}
+        self.duplicates = 0
+
+    def add(self, chunk_index: int, records: list[BaseModel]):
+        for position, record in enumerate(records):
+            data = record.model_dump()
+            key = tuple(normalize_key(data[f]) for f in self.key_fields)
+            if key not in self.records:
+                self.records[key] = ((chunk_index, position), data)
+                continue
+
+            self.duplicates += 1
+            order, kept = self.records[key]
+            for name, value in data.items():
+                if kept.get(name) in (None, "", []):
+                    kept[name] = value
+                elif isinstance(kept[name], list) and isinstance(value, list):
+                    kept[name] += [v for v in value if v not in kept[name]]
+            self.records[key] = (min(order, (chunk_index, position)), kept)
+
+    def results(self) -> list[BaseModel]:
+        ordered = sorted(self.records.values(), key=lambda item: item[0])
+        return [self.schema.model_validate(data) for _, data in ordered]
+
+
+# --------------------🗺 Map: Per-Chunk Extraction --------------------
+def records_model(schema: type[BaseModel]) -> type[BaseModel]:
+    return create_model(f"{schema.__name__}Records", records=(list[schema], ...))
+
+
+def extract_chunk(chunk: Chunk, schema: type[BaseModel], wrapper: type[BaseModel],
+                  model: str, retries: int) -> list[BaseModel]:
+    client = get_client()
+    for attempt in range(retries + 1):
+        try:
+            response = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT.format(name=schema.__name__)},
+                    {"role": "user", "content": chunk.text},
+                ],
+                response_format={
+                    "type": "json_schema",
+                    "json_schema": {
+                        "name": wrapper.__name__,
+                        "schema": wrapper.model_json_schema(),
+                        "strict": True,
+                    },
+                },
+            )
+            return wrapper.model_validate_json(response.choices[0].message.content).records
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = min(30.0, 2 ** attempt) * random.uniform(0.5, 1.5)
+            print(f"\n⚠️ Chunk {chunk.index} attempt {attempt + 1} failed ({e!s:.80}); "
+                  f"retrying in {delay:.1f}s", file=sys.stderr)
+            time.sleep(delay)
+
+
+# --------------------🚀 Pipeline --------------------
+def run_extraction(path: str, schema: type[BaseModel], key_fields: list[str] | None = None,
+                   max_tokens: int = 3000, overlap_tokens: int = 200,
+                   concurrency: int = 8, retries: int = 3, model: str = MODEL,
+                   extract=None) -> tuple[list[BaseModel], list[int]]:
+    """Return (merged records in document order, indices of chunks that failed)."""
+    extract = extract or extract_chunk
+    progress = ReadProgress(os.path.getsize(path))
+    chunks = iter_chunks(iter_text(path, progress), max_tokens, overlap_tokens)
+    wrapper = records_model(schema)
+    reducer = RecordReducer(schema, key_fields)
+    failed = []
+    done = extracted = 0
+    started = last_report = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = {}
+        exhausted = False
+        while pending or not exhausted:
+            # Keep a bounded window in flight so huge files never sit in memory
+            while not exhausted and len(pending) < concurrency * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                future = pool.submit(extract, chunk, schema, wrapper, model, retries)
+                pending[future] = chunk.index
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = pending.pop(future)
+                done += 1
+                try:
+                    records = future.result()
+                    extracted += len(records)
+                    reducer.add(index, records)
+                except Exception as e:
+                    failed.append(index)
+                    print(f"\n❌ Chunk {index} gave up: {e!s:.120}", file=sys.stderr)
+
+            now = time.perf_counter()
+            if now - last_report < PROGRESS_INTERVAL and (pending or not exhausted):
+                continue
+            last_report = now
+            elapsed = max(now - started, 1e-9)
+            percent = 100 * progress.bytes_read / progress.total_bytes if progress.total_bytes else 100
+            print(f"\r📦 {done} chunks | {percent:5.1f}% read | {extracted} records "
+                  f"| {done / elapsed:.2f} chunks/s | {progress.bytes_read / elapsed / 1024:.0f} KiB/s",
+                  end="", file=sys.stderr, flush=True)
+
+    results = reducer.results()
+    print(f"\n✅ {len(results)} unique records ({reducer.duplicates} duplicates merged) "
+          f"from {done} chunks in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return results, sorted(failed)
+
+
+def load_schema(target: str) -> type[BaseModel]:
+    module_name, _, class_name = target.partition(":")
+    schema = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(schema, type) and issubclass(schema, BaseModel)):
+        raise ValueError(f"{target} is not a Pydantic model")
+    return schema
+
+
+def main(args) -> int:
+    schema = load_schema(args.schema)
+    results, failed = run_extraction(
+        args.input,
+        schema,
+        key_fields=args.key or None,
+        max_tokens=args.chunk_tokens,
+        overlap_tokens=args.overlap,
+        concurrency=args.concurrency,
+        retries=args.retries,
+        model=args.model,
+    )
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for record in results:
+            out.write(record.model_dump_json() + "\n")
+    finally:
+        if args.output:
+            out.close()
+            print(f"💾 Wrote {len(results)} records to {args.output}", file=sys.stderr)
+
+    if failed:
+        print(f"⚠️ {len(failed)} chunks failed after retries: {failed[:20]}", file=sys.stderr)
+        return 1
+    return 0
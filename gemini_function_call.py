@@ -1,19 +1,6 @@
-import os
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
+from gemini_client import get_client
 
-# --------------------🔐 Load API Key --------------------
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("❌ GEMINI_API_KEY not found in .env file.")
-
-# --------------------🤖 Initialize Gemini Client --------------------
-client = OpenAI(
-    api_key=api_key,
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
-)
 
 # --------------------🌤️ Simulated Tool Function --------------------
 def get_weather(location: str) -> dict:
@@ -44,6 +31,7 @@ tools = [
 
 # --------------------💬 Main Chat Completion Flow --------------------
 def main():
+    client = get_client()
     print("🌐 Asking Gemini for weather in Rawalpindi...\n")
 
     messages = [
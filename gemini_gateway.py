@@ -0,0 +1,132 @@
+import json
+import math
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from gemini_client import get_client
+from gemini_scheduler import PRIORITY_CLASSES, LoadShed, Scheduler
+
+# --------------------🌐 Chat Gateway --------------------
+# A tiny OpenAI-compatible endpoint so other processes can share one Gemini
+# client and one quota instead of each holding their own key. Every upstream
+# call goes through a fair-queueing scheduler; callers identify themselves
+# with these optional headers:
+#   X-Tenant       tenant name (default "default")
+#   X-Priority     "interactive" (default) or "batch"
+#   X-Deadline-Ms  answer 503 early if the reply can't be served in time
+CHAT_PATH = "/v1/chat/completions"
+
+scheduler = Scheduler()
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    server_version = "GeminiGateway/0.1"
+
+    def do_POST(self):
+        self.streaming = False
+        if self.path.rstrip("/") != CHAT_PATH:
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError) as e:
+            self.send_json(400, {"error": f"Invalid JSON body: {e}"})
+            return
+
+        tenant = self.headers.get("X-Tenant", "default")
+        priority = self.headers.get("X-Priority", "interactive")
+        deadline_ms = self.headers.get("X-Deadline-Ms")
+        if priority not in PRIORITY_CLASSES:
+            self.send_json(400, {"error": f"X-Priority must be one of {sorted(PRIORITY_CLASSES)}"})
+            return
+        timeout = None
+        if deadline_ms:
+            try:
+                timeout = float(deadline_ms) / 1000
+            except ValueError:
+                timeout = -1.0
+            if not 0 < timeout < math.inf:
+                self.send_json(400, {"error": "X-Deadline-Ms must be a positive number of milliseconds"})
+                return
+
+        try:
+            scheduler.run(
+                lambda: self.complete(payload),
+                tenant=tenant,
+                priority=priority,
+                timeout=timeout,
+            )
+        except LoadShed as e:
+            self.send_json(503, {"error": str(e)}, {"Retry-After": "1"})
+        except Exception as e:
+            if self.streaming:
+                self.end_stream_with_error(e)
+                return
+            from openai import APIStatusError
+
+            # The caller's own mistakes (bad model, bad params) keep their 4xx
+            status = 502
+            if isinstance(e, APIStatusError) and 400 <= e.status_code < 500:
+                status = e.status_code
+            self.send_json(status, {"error": str(e)})
+
+    def complete(self, payload: dict):
+        if payload.get("stream"):
+            self.stream_completion(payload)
+        else:
+            response = get_client().chat.completions.create(**payload)
+            self.send_body(200, response.model_dump_json().encode())
+
+    def stream_completion(self, payload: dict):
+        stream = get_client().chat.completions.create(**payload)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.streaming = True
+        for chunk in stream:
+            self.wfile.write(b"data: " + chunk.model_dump_json().encode() + b"\n\n")
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def end_stream_with_error(self, error: Exception):
+        # The 200 is already out, so a second status line would corrupt the
+        # stream; report the failure as a final event and hang up instead
+        self.close_connection = True
+        try:
+            self.wfile.write(b"data: " + json.dumps({"error": str(error)}).encode() + b"\n\n")
+            self.wfile.flush()
+        except OSError:
+            pass
+
+    def send_json(self, status: int, data: dict, headers: dict | None = None):
+        self.send_body(status, json.dumps(data).encode(), headers)
+
+    def send_body(self, status: int, body: bytes, headers: dict | None = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# --------------------🚀 Entry Point --------------------
+def serve(host: str = "127.0.0.1", port: int = 8000, concurrency: int = 8,
+          weights: dict[str, float] | None = None):
+    global scheduler
+    get_client()  # fail fast on a missing API key
+    scheduler = Scheduler(concurrency=concurrency, weights=weights)
+    server = ThreadingHTTPServer((host, port), GatewayHandler)
+    print(f"🌐 Gemini gateway listening on http://{host}:{port}{CHAT_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Gateway stopped.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve()
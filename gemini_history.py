@@ -0,0 +1,117 @@
+import json
+
+# --------------------🗂 Compact Conversation History --------------------
+# Messages are plain slotted objects that serialize themselves exactly once.
+# History keeps the comma-joined JSON of every message in sealed, immutable
+# segments plus one small open buffer, so a request body is a short list of
+# cached fragments (prefix, segments, open buffer, pre-encoded parameters)
+# with no per-turn re-validation, re-encoding or copying of old messages.
+# The same bytes are what the memory file stores.
+
+MESSAGE_FIELDS = ("role", "content", "tool_calls", "tool_call_id", "name")
+SEGMENT_SIZE = 64 * 1024
+
+
+def encode(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def encode_params(**params) -> bytes:
+    """Encode request parameters once so they can be reused on every turn."""
+    return encode(params)[1:-1] if params else b""
+
+
+class Message:
+    __slots__ = MESSAGE_FIELDS + ("_json",)
+
+    def __init__(self, role: str, content=None, tool_calls=None,
+                 tool_call_id: str | None = None, name: str | None = None):
+        self.role = role
+        self.content = content
+        self.tool_calls = tool_calls
+        self.tool_call_id = tool_call_id
+        self.name = name
+        self._json = None
+
+    @classmethod
+    def from_any(cls, message) -> "Message":
+        """Accept a Message, a plain dict, or an SDK (pydantic) message object."""
+        if isinstance(message, cls):
+            return message
+        if not isinstance(message, dict):
+            message = message.model_dump(exclude_none=True)
+        return cls(**{k: message[k] for k in MESSAGE_FIELDS if message.get(k) is not None})
+
+    def to_dict(self) -> dict:
+        return {k: getattr(self, k) for k in MESSAGE_FIELDS if getattr(self, k) is not None}
+
+    @property
+    def json(self) -> bytes:
+        # Messages are treated as immutable once created, so this never goes stale
+        if self._json is None:
+            self._json = encode(self.to_dict())
+        return self._json
+
+    def __repr__(self):
+        return f"Message({self.to_dict()!r})"
+
+
+class History:
+    __slots__ = ("messages", "_segments", "_open")
+
+    def __init__(self, messages=()):
+        self.messages = []
+        self._segments = []
+        self._open = bytearray()
+        for message in messages:
+            self.append(message)
+
+    def append(self, message) -> Message:
+        message = Message.from_any(message)
+        if self.messages:
+            self._open += b","
+        self._open += message.json
+        self.messages.append(message)
+        if len(self._open) >= SEGMENT_SIZE:
+            self._segments.append(bytes(self._open))
+            self._open = bytearray()
+        return message
+
+    def truncate(self, length: int):
+        """Drop messages after the first `length`, e.g. to undo a failed turn."""
+        if length < len(self.messages):
+            kept = self.messages[:length]
+            self.messages, self._segments, self._open = [], [], bytearray()
+            for message in kept:
+                self.append(message)
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __getitem__(self, index):
+        return self.messages[index]
+
+    def request_parts(self, params: bytes = b"") -> list[bytes]:
+        """Chat completion body as fragments: cached history plus pre-encoded `params`.
+
+        Only the open buffer (at most SEGMENT_SIZE) is copied, so the cost
+        stays flat however long the conversation gets.
+        """
+        tail = b"]," + params + b"}" if params else b"]}"
+        return [b'{"messages":[', *self._segments, bytes(self._open), tail]
+
+    def request_body(self, params: bytes = b"") -> bytes:
+        return b"".join(self.request_parts(params))
+
+    def to_list(self) -> list[dict]:
+        return [message.to_dict() for message in self.messages]
+
+    def dump_json(self) -> bytes:
+        return b"".join((b"[", *self._segments, self._open, b"]"))
+
+    @classmethod
+    def load_json(cls, data: bytes | str) -> "History":
+        return cls(json.loads(data))
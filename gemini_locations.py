@@ -0,0 +1,419 @@
+import bisect
+import difflib
+import gzip
+import io
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import NamedTuple
+
+# --------------------🗺 Location Resolver --------------------
+# Resolves free-form city names from tool calls to an IANA timezone (and
+# coordinates where known). The index is built once, on first lookup, from
+# every zone in the IANA database (via pytz's zone.tab) plus the GeoNames city
+# file below, and answers exact, alias, prefix and typo-tolerant queries.
+# Results and tz objects are memoized, so repeat lookups are dict hits.
+
+
+class Location(NamedTuple):
+    name: str
+    country: str
+    timezone: str
+    lat: float | None = None
+    lon: float | None = None
+    region: str = ""   # state or province, for "Dallas, TX"
+
+
+# --------------------🏙 City Data --------------------
+# data/cities.tsv.gz is GeoNames' cities15000 (every city of 15,000 or more
+# people, CC BY 4.0, geonames.org) as trimmed by trim_geonames(): most populous
+# first, with US, Canadian and Australian regions as postal codes.
+# name | ASCII name if different | country | region | timezone | lat | lon
+CITY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cities.tsv.gz")
+
+# GeoNames numbers Canadian and Australian admin1 regions; US ones are already postal
+ADMIN1_POSTAL = {
+    "CA": {"01": "AB", "02": "BC", "03": "MB", "04": "NB", "05": "NL", "07": "NS",
+           "08": "ON", "09": "PE", "10": "QC", "11": "SK", "12": "YT", "13": "NT", "14": "NU"},
+    "AU": {"01": "ACT", "02": "NSW", "03": "NT", "04": "QLD", "05": "SA", "06": "TAS",
+           "07": "VIC", "08": "WA"},
+}
+
+# Nicknames and former names, which GeoNames only lists among hundreds of
+# translations and airport codes. name | country | aliases
+ALIASES = """\
+Islamabad|PK|isb
+Rawalpindi|PK|pindi
+Faisalabad|PK|lyallpur
+Mumbai|IN|bombay
+Bengaluru|IN|bangalore
+Chennai|IN|madras
+Kolkata|IN|calcutta
+Pune|IN|poona
+Beijing|CN|peking
+Guangzhou|CN|canton
+Hong Kong|HK|hk
+Busan|KR|pusan
+Ho Chi Minh City|VN|saigon;hcmc
+Kuala Lumpur|MY|kl
+Dhaka|BD|dacca
+Jeddah|SA|jiddah
+Makkah|SA|mecca
+Madinah|SA|medina
+Istanbul|TR|constantinople
+Johannesburg|ZA|joburg;jozi
+Munich|DE|munchen;muenchen
+Vienna|AT|wien
+Prague|CZ|praha
+Rome|IT|roma
+Milan|IT|milano
+Naples|IT|napoli
+Lisbon|PT|lisboa
+Moscow|RU|moskva
+Saint Petersburg|RU|st petersburg;leningrad
+Kyiv|UA|kiev
+New York City|US|new york;nyc;manhattan
+Washington|US|washington dc;dc
+Los Angeles|US|la
+San Francisco|US|sf;san fran
+Las Vegas|US|vegas
+Mexico City|MX|cdmx
+Rio de Janeiro|BR|rio
+"""
+
+# Short generic names that should still resolve to UTC on purpose
+UTC_ALIASES = ("utc", "gmt", "zulu", "universal")
+
+# Qualifiers accepted after a comma ("Paris, France", "Dallas, TX", "Perth, WA")
+# besides ISO country codes and pytz's country names. Two-letter codes may read
+# either way ("CA" is Canada or California); a city matching any reading is kept.
+# country | region | names
+REGIONS = """\
+US||usa;america;united states;united states of america
+US|AL|alabama
+US|AK|alaska
+US|AZ|arizona
+US|AR|arkansas
+US|CA|california
+US|CO|colorado
+US|CT|connecticut
+US|DE|delaware
+US|DC|district of columbia;washington dc;dc
+US|FL|florida
+US|GA|georgia
+US|HI|hawaii
+US|ID|idaho
+US|IL|illinois
+US|IN|indiana
+US|IA|iowa
+US|KS|kansas
+US|KY|kentucky
+US|LA|louisiana
+US|ME|maine
+US|MD|maryland
+US|MA|massachusetts
+US|MI|michigan
+US|MN|minnesota
+US|MS|mississippi
+US|MO|missouri
+US|MT|montana
+US|NE|nebraska
+US|NV|nevada
+US|NH|new hampshire
+US|NJ|new jersey
+US|NM|new mexico
+US|NY|new york
+US|NC|north carolina
+US|ND|north dakota
+US|OH|ohio
+US|OK|oklahoma
+US|OR|oregon
+US|PA|pennsylvania
+US|RI|rhode island
+US|SC|south carolina
+US|SD|south dakota
+US|TN|tennessee
+US|TX|texas
+US|UT|utah
+US|VT|vermont
+US|VA|virginia
+US|WA|washington
+US|WV|west virginia
+US|WI|wisconsin
+US|WY|wyoming
+CA|AB|alberta
+CA|BC|british columbia
+CA|MB|manitoba
+CA|NB|new brunswick
+CA|NL|newfoundland;newfoundland and labrador
+CA|NS|nova scotia
+CA|ON|ontario
+CA|PE|prince edward island;pei
+CA|QC|quebec
+CA|SK|saskatchewan
+CA|YT|yukon
+CA|NT|northwest territories
+CA|NU|nunavut
+AU|ACT|australian capital territory
+AU|NSW|new south wales
+AU|NT|northern territory
+AU|QLD|queensland
+AU|SA|south australia
+AU|TAS|tasmania
+AU|VIC|victoria
+AU|WA|western australia
+GB||uk;britain;great britain;england;scotland;wales;northern ireland
+AE||uae
+KR||korea;south korea
+RU||russia
+"""
+
+
+# --------------------🔤 Normalization --------------------
+# Letters NFKD leaves alone ("Łódź", "Tromsø")
+UNDECOMPOSED = str.maketrans({"ł": "l", "ø": "o", "đ": "d", "ħ": "h", "ı": "i", "æ": "ae", "œ": "oe"})
+SEPARATORS = re.compile(r"[_\-./']+")
+PUNCTUATION = re.compile(r"[^\w\s,]")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    text = SEPARATORS.sub(" ", text.casefold().translate(UNDECOMPOSED))
+    text = PUNCTUATION.sub("", text)
+    return " ".join(text.split())
+
+
+def parse_coordinate(text: str, degree_digits: int) -> float:
+    # ISO 6709 as used by zone.tab: ±DDMM[SS] / ±DDDMM[SS]
+    sign = -1 if text[0] == "-" else 1
+    digits = text[1:]
+    degrees = int(digits[:degree_digits])
+    minutes = int(digits[degree_digits:degree_digits + 2])
+    seconds = int(digits[degree_digits + 2:] or 0)
+    return round(sign * (degrees + minutes / 60 + seconds / 3600), 2)
+
+
+# --------------------🧭 Index --------------------
+class LocationIndex:
+    def __init__(self):
+        self.exact: dict[str, Location] = {}
+        self.places: dict[str, list[Location]] = {}   # every city sharing a name
+        self.qualifiers: dict[str, set[tuple[str, str]]] = {}   # -> {(country, region)}
+        self.keys: list[str] = []
+        self.buckets: dict[tuple[str, int], list[str]] = {}   # (first letter, length) -> keys
+        self.lengths: dict[int, list[str]] = {}
+
+    def add(self, key: str, location: Location, replace: bool = False, city: bool = True):
+        """Index `key`; only `city` keys are candidates for prefix/typo matching.
+
+        Zone names ("US/Eastern"), legacy zones ("Poland", "GB") and aliases
+        like "UTC" must be typed exactly, so a near-miss never lands on them.
+        """
+        key = normalize(key)
+        if not key:
+            return
+        if replace or key not in self.exact:
+            self.exact[key] = location
+        if city:
+            self.places.setdefault(key, []).append(location)
+
+    def finish(self):
+        self.keys = sorted(self.places)
+        for key in self.keys:
+            self.buckets.setdefault((key[0], len(key)), []).append(key)
+            self.lengths.setdefault(len(key), []).append(key)
+
+    @classmethod
+    def build(cls) -> "LocationIndex":
+        import pytz
+
+        index = cls()
+
+        # Every IANA zone, keyed by its full name and its last component
+        zone_tab = {}
+        with pytz.open_resource("zone.tab") as f:
+            for line in f.read().decode("utf-8").splitlines():
+                if line.startswith("#") or not line.strip():
+                    continue
+                country, coords, zone = line.split("\t")[:3]
+                split = max(coords.rfind("+"), coords.rfind("-"))
+                lat_text, lon_text = coords[:split], coords[split:]
+                zone_tab[zone] = (
+                    country,
+                    parse_coordinate(lat_text, 2),
+                    parse_coordinate(lon_text, 3),
+                )
+
+        for zone in pytz.all_timezones:
+            country, lat, lon = zone_tab.get(zone, ("", None, None))
+            city = zone.rsplit("/", 1)[-1].replace("_", " ")
+            location = Location(city, country, zone, lat, lon)
+            index.add(zone, location, replace=True, city=False)
+            # Legacy zones like "US/Eastern" name regions, not cities
+            if zone in zone_tab:
+                index.add(city, location)
+
+        # The most populous city with a name wins over smaller namesakes and
+        # over zone-derived names (e.g. "Hyderabad")
+        seen = set()
+        with gzip.open(CITY_FILE, "rt", encoding="utf-8") as f:
+            for line in f:
+                name, ascii_name, country, region, zone, lat, lon = line.rstrip("\n").split("\t")
+                location = Location(name, country, zone, float(lat), float(lon), region)
+                for key in {normalize(text) for text in (name, ascii_name) if text}:
+                    index.add(key, location, replace=key not in seen)
+                    seen.add(key)
+
+        for line in ALIASES.splitlines():
+            name, country, aliases = line.split("|")
+            location = next(
+                loc for loc in index.places[normalize(name)] if loc.country == country
+            )
+            for alias in aliases.split(";"):
+                index.add(alias, location, replace=True)
+
+        for code, name in pytz.country_names.items():
+            for key in (code, name):
+                index.qualifiers.setdefault(normalize(key), set()).add((code, ""))
+        for line in REGIONS.splitlines():
+            country, region, names = line.split("|")
+            for key in (region, *names.split(";")):
+                if key:
+                    index.qualifiers.setdefault(normalize(key), set()).add((country, region))
+
+        utc = Location("UTC", "", "UTC")
+        for alias in UTC_ALIASES:
+            index.add(alias, utc, replace=True, city=False)
+
+        index.finish()
+        return index
+
+    # --------------------🔎 Lookup --------------------
+    def prefix(self, key: str) -> Location | None:
+        # "philadel" -> Philadelphia, but not "mars" -> Marseille or "kuala" -> Kuala Lumpur:
+        # the prefix must cover half the name and complete to exactly one place
+        if len(key) < 4:
+            return None
+        start = bisect.bisect_left(self.keys, key)
+        matches = set()
+        for candidate in self.keys[start:start + 20]:
+            if not candidate.startswith(key):
+                break
+            if len(key) * 2 < len(candidate):
+                return None
+            matches.add(self.exact[candidate])
+        return matches.pop() if len(matches) == 1 else None
+
+    def fuzzy(self, key: str) -> Location | None:
+        start = bisect.bisect_left(self.keys, key)
+        if start < len(self.keys) and self.keys[start].startswith(key):
+            return None   # an unfinished name ("kuala"), not a typo
+        # Swapped neighbours ("toyko"), substitutions ("tokio"), missing
+        # ("berln") and extra letters first — they are the most common slips
+        # and cheap to check exactly
+        for i in range(len(key) - 1):
+            swapped = key[:i] + key[i + 1] + key[i] + key[i + 2:]
+            if swapped in self.places:
+                return self.exact[swapped]
+        if len(key) < 5:
+            # Four letters are one edit away from too many real places ("mars" -> Maros)
+            return None
+        for candidate in self.buckets.get((key[0], len(key)), ()):
+            if sum(a != b for a, b in zip(candidate, key)) == 1:
+                return self.exact[candidate]
+        for candidate in self.buckets.get((key[0], len(key) + 1), ()):
+            i = next((i for i, (a, b) in enumerate(zip(candidate, key)) if a != b), len(key))
+            if candidate[i + 1:] == key[i:]:
+                return self.exact[candidate]
+        for i in range(1, len(key)):
+            shorter = key[:i] + key[i + 1:]
+            if shorter in self.places:
+                return self.exact[shorter]
+
+        # Only names within two letters of the query can reach the cutoffs
+        nearby = range(len(key) - 2, len(key) + 3)
+        candidates = [k for n in nearby for k in self.buckets.get((key[0], n), ())]
+        matches = difflib.get_close_matches(key, candidates, n=1, cutoff=0.82)
+        if not matches:
+            # The first letter may be the typo; fall back to every first letter
+            candidates = [k for n in nearby for k in self.lengths.get(n, ())]
+            matches = difflib.get_close_matches(key, candidates, n=1, cutoff=0.85)
+        return self.exact[matches[0]] if matches else None
+
+    def resolve(self, query: str) -> Location | None:
+        key = normalize(query)
+        if not key:
+            return None
+        if key in self.exact:
+            return self.exact[key]
+
+        city, _, qualifier = (part.strip() for part in key.partition(","))
+        if not qualifier:
+            return self.prefix(city) or self.fuzzy(city)
+
+        # "Paris, Narnia" must not quietly become Paris, France
+        readings = self.qualifiers.get(qualifier)
+        if not readings:
+            return None
+
+        def within(location: Location | None) -> bool:
+            return location is not None and any(
+                location.country == country and region in ("", location.region)
+                for country, region in readings
+            )
+
+        for location in (self.exact.get(city), *self.places.get(city, ())):
+            if within(location):
+                return location
+        location = None if city in self.places else self.prefix(city) or self.fuzzy(city)
+        return location if within(location) else None
+
+
+# --------------------🚀 Public API --------------------
+@lru_cache(maxsize=1)
+def get_index() -> LocationIndex:
+    return LocationIndex.build()
+
+
+@lru_cache(maxsize=4096)
+def resolve_location(query: str) -> Location | None:
+    """Resolve a city, alias, zone name or near-miss spelling; None if unknown."""
+    return get_index().resolve(query)
+
+
+@lru_cache(maxsize=None)
+def get_timezone(zone: str):
+    import pytz
+
+    return pytz.timezone(zone)
+
+
+# --------------------🛠 City File --------------------
+def trim_geonames(src: str, dest: str = CITY_FILE):
+    """Rebuild CITY_FILE from a GeoNames dump such as cities15000.txt."""
+    import pytz
+
+    rows = []
+    with open(src, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            # A few names carry their district ("Misato, Saitama")
+            name, ascii_name = (field.split(",")[0].strip() for field in fields[1:3])
+            country, admin1, zone = fields[8], fields[10], fields[17]
+            if zone not in pytz.all_timezones_set:
+                continue
+            region = admin1 if country == "US" else ADMIN1_POSTAL.get(country, {}).get(admin1, "")
+            if normalize(ascii_name) == normalize(name):
+                ascii_name = ""
+            rows.append((-int(fields[14] or 0), name, ascii_name, country, region, zone,
+                         f"{float(fields[4]):.2f}", f"{float(fields[5]):.2f}"))
+
+    rows.sort()
+    # mtime=0 keeps the file byte-identical across rebuilds of the same dump
+    with gzip.GzipFile(dest, "wb", mtime=0) as raw, io.TextIOWrapper(raw, encoding="utf-8") as f:
+        for row in rows:
+            f.write("\t".join(row[1:]) + "\n")
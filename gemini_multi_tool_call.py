@@ -1,30 +1,21 @@
-import os
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
+from gemini_client import get_client
 from datetime import datetime
-import pytz
+from gemini_locations import get_timezone, resolve_location
+from gemini_tool_selector import ToolSelector, create_with_tools
 
-# --------------------🔐 Load API Key --------------------
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("❌ GEMINI_API_KEY is missing in .env")
-
-# --------------------🤖 Initialize Gemini Client --------------------
-client = OpenAI(
-    api_key=api_key,
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
-)
 
 # --------------------🌤 Tool 1: Weather --------------------
 def get_current_weather(location: str) -> dict:
     print(f"📡 [Tool Called] get_current_weather(location='{location}')")
+    place = resolve_location(location)
     result = {
-        "location": location,
+        "location": place.name if place else location,
         "temperature": "26°C",
         "condition": "Sunny"
     }
+    if place and place.lat is not None:
+        result["coordinates"] = {"lat": place.lat, "lon": place.lon}
     print(f"✅ [Tool Result] {result}\n")
     return result
 
@@ -32,13 +23,11 @@ def get_current_weather(location: str) -> dict:
 def get_current_time(city: str) -> dict:
     print(f"📡 [Tool Called] get_current_time(city='{city}')")
     try:
-        timezone_map = {
-            "tokyo": "Asia/Tokyo",
-            "lahore": "Asia/Karachi"
-        }
-        tz = pytz.timezone(timezone_map.get(city.lower(), "UTC"))
-        now = datetime.now(tz).strftime("%I:%M %p")
-        result = {"city": city, "current_time": now}
+        place = resolve_location(city)
+        if place is None:
+            raise ValueError(f"Unknown city '{city}'")
+        now = datetime.now(get_timezone(place.timezone)).strftime("%I:%M %p")
+        result = {"city": place.name, "timezone": place.timezone, "current_time": now}
     except Exception as e:
         result = {"city": city, "error": str(e)}
     print(f"✅ [Tool Result] {result}\n")
@@ -78,6 +67,7 @@ tools = [
 
 # --------------------💬 Multi-Tool Flow --------------------
 def main():
+    client = get_client()
     print("🌍 Asking Gemini for weather and time...\n")
 
     messages = [
@@ -86,10 +76,13 @@ def main():
     ]
 
     # Step 1: Gemini generates tool calls
-    response = client.chat.completions.create(
+    # Only the most relevant tools are sent once the registry grows past k
+    selector = ToolSelector(tools, k=8)
+    response, selected_tools = create_with_tools(
+        client,
+        selector,
+        messages,
         model="gemini-2.5-flash",
-        messages=messages,
-        tools=tools,
         tool_choice="auto"
     )
 
@@ -126,11 +119,12 @@ def main():
     final_response = client.chat.completions.create(
         model="gemini-2.5-flash",
         messages=messages,
-        tools=tools
+        tools=selected_tools
     )
 
     print("✅ Gemini’s Final Answer:\n")
     print(final_response.choices[0].message.content)
+    print(f"\n{selector.report()}")
 
 # --------------------🚀 Run --------------------
 if __name__ == "__main__":
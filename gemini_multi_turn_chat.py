@@ -1,21 +1,11 @@
 import os
 import json
-from openai import OpenAI
-from dotenv import load_dotenv
+from gemini_client import MODEL, ChatCompletionError, post_chat_completion
+from gemini_history import History, encode_params
 from datetime import datetime
-import pytz
+from gemini_locations import get_timezone, resolve_location
+from gemini_profile import checkpoint, stage
 
-# Load environment variables
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("❌ GEMINI_API_KEY is missing.")
-
-# Initialize client
-client = OpenAI(
-    api_key=api_key,
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
-)
 
 # Optional memory file
 MEMORY_FILE = "chat_memory.json"
@@ -23,19 +13,19 @@ MEMORY_FILE = "chat_memory.json"
 # Define tools
 def get_current_weather(location: str) -> dict:
     print(f"📡 [Tool Called] get_current_weather('{location}')")
-    return {"location": location, "temperature": "26°C", "condition": "Sunny"}
+    place = resolve_location(location)
+    result = {"location": place.name if place else location, "temperature": "26°C", "condition": "Sunny"}
+    if place and place.lat is not None:
+        result["coordinates"] = {"lat": place.lat, "lon": place.lon}
+    return result
 
 def get_current_time(city: str) -> dict:
     print(f"📡 [Tool Called] get_current_time('{city}')")
-    tz_map = {
-        "lahore": "Asia/Karachi",
-        "new york": "America/New_York",
-        "tokyo": "Asia/Tokyo",
-        "london": "Europe/London"
-    }
-    tz = pytz.timezone(tz_map.get(city.lower(), "UTC"))
-    now = datetime.now(tz).strftime("%I:%M %p")
-    return {"city": city, "current_time": now}
+    place = resolve_location(city)
+    if place is None:
+        return {"city": city, "error": f"Unknown city '{city}'"}
+    now = datetime.now(get_timezone(place.timezone)).strftime("%I:%M %p")
+    return {"city": place.name, "timezone": place.timezone, "current_time": now}
 
 tools = [
     {
@@ -68,17 +58,61 @@ tools = [
     }
 ]
 
+# Request parameters are encoded once and reused for every turn
+TOOLS_AUTO_PARAMS = encode_params(model=MODEL, tools=tools, tool_choice="auto")
+TOOLS_PARAMS = encode_params(model=MODEL, tools=tools)
+
 # Load memory from disk (optional)
-def load_memory() -> list:
+def load_memory() -> History:
     if os.path.exists(MEMORY_FILE):
-        with open(MEMORY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return [{"role": "system", "content": "You are a helpful assistant."}]
+        with open(MEMORY_FILE, "rb") as f:
+            return History.load_json(f.read())
+    return History([{"role": "system", "content": "You are a helpful assistant."}])
+
+# Save memory to disk — the same bytes that are sent to the API
+def save_memory(messages: History):
+    with open(MEMORY_FILE, "wb") as f:
+        f.write(messages.dump_json())
+
+# One user turn: the request, any tool calls, and the follow-up request
+def run_turn(messages: History, user_input: str):
+    # Add user message to history
+    messages.append({"role": "user", "content": user_input})
+
+    # First request — LLM may call tool(s)
+    with stage("serialize"):
+        body = messages.request_parts(TOOLS_AUTO_PARAMS)
+    response = post_chat_completion(body)
+    with stage("history"):
+        assistant_msg = messages.append(response["choices"][0]["message"])
+
+    # If tools were called
+    if assistant_msg.tool_calls:
+        for tc in assistant_msg.tool_calls:
+            name = tc["function"]["name"]
+            args = json.loads(tc["function"]["arguments"])
+            with stage("tool"):
+                result = (
+                    get_current_weather(args["location"])
+                    if name == "get_current_weather"
+                    else get_current_time(args["city"])
+                )
 
-# Save memory to disk
-def save_memory(messages: list):
-    with open(MEMORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(messages, f, indent=2)
+            messages.append({
+                "role": "tool",
+                "tool_call_id": tc["id"],
+                "name": name,
+                "content": json.dumps(result)
+            })
+
+        # Follow-up call to LLM with tool results
+        with stage("serialize"):
+            body = messages.request_parts(TOOLS_PARAMS)
+        response = post_chat_completion(body)
+        with stage("history"):
+            assistant_msg = messages.append(response["choices"][0]["message"])
+
+    return assistant_msg
 
 # Main interactive loop
 def chat_loop():
@@ -86,52 +120,22 @@ def chat_loop():
     print("💬 Gemini Chat (with multi-turn memory & tools) — type 'exit' to stop\n")
 
     while True:
-        user_input = input("👤 You: ")
+        checkpoint("turn", messages=len(messages))
+        with stage("input"):
+            user_input = input("👤 You: ")
         if user_input.lower() in {"exit", "quit"}:
             save_memory(messages)
             print("💾 Chat memory saved. Goodbye!")
             break
 
-        # Add user message to history
-        messages.append({"role": "user", "content": user_input})
-
-        # First request — LLM may call tool(s)
-        response = client.chat.completions.create(
-            model="gemini-2.5-flash",
-            messages=messages,
-            tools=tools,
-            tool_choice="auto"
-        )
-
-        assistant_msg = response.choices[0].message
-        tool_calls = getattr(assistant_msg, "tool_calls", [])
-        messages.append(assistant_msg)
-
-        # If tools were called
-        if tool_calls:
-            for tc in tool_calls:
-                args = json.loads(tc.function.arguments)
-                result = (
-                    get_current_weather(args["location"])
-                    if tc.function.name == "get_current_weather"
-                    else get_current_time(args["city"])
-                )
-
-                messages.append({
-                    "role": "tool",
-                    "tool_call_id": tc.id,
-                    "name": tc.function.name,
-                    "content": json.dumps(result)
-                })
-
-            # Follow-up call to LLM with tool results
-            response = client.chat.completions.create(
-                model="gemini-2.5-flash",
-                messages=messages,
-                tools=tools
-            )
-            assistant_msg = response.choices[0].message
-            messages.append(assistant_msg)
+        turn_start = len(messages)
+        try:
+            assistant_msg = run_turn(messages, user_input)
+        except ChatCompletionError as e:
+            # Keep the session alive; drop the half-finished turn so it can be retried
+            messages.truncate(turn_start)
+            print(f"⚠️ Request failed: {e}\n   Your message was not kept — try again.")
+            continue
 
         print("🤖 Gemini:", assistant_msg.content)
 
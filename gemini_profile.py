@@ -0,0 +1,268 @@
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+# --------------------🔬 Profiling Mode --------------------
+# `gemini --profile <command>` answers "where did this turn's time go?".
+#
+#   stage("network")   marks a pipeline stage; records wall/CPU time and the
+#                      memory it allocated (net) and peaked at (tracemalloc)
+#   checkpoint(...)    marks a turn boundary; records traced memory plus any
+#                      gauges (e.g. history length) to expose slow leaks
+#
+# A background thread samples the stacks of threads inside a stage every few
+# milliseconds, which is enough for a flamegraph without tracing every call.
+# When profiling is off both calls are near-free no-ops.
+#
+# Output (in --profile-dir):
+#   stages.txt / stages.json   per-stage time and allocation table
+#   flamegraph.folded          "stage;module:function;... count" lines for
+#                              flamegraph.pl, speedscope or inferno
+#   memory.csv                 traced memory and gauges at every checkpoint
+#   growth.txt                 memory growth per turn and top growing sites
+
+_profiler = None
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+def stage(name: str):
+    return NULL_STAGE if _profiler is None else _StageTimer(_profiler, name)
+
+
+def checkpoint(label: str = "turn", **gauges):
+    if _profiler is not None:
+        _profiler.checkpoint(label, **gauges)
+
+
+def enable(out_dir: str = "profile", interval: float = 0.005, frames: int = 16) -> "Profiler":
+    global _profiler
+    _profiler = Profiler(out_dir, interval, frames)
+    _profiler.start()
+    return _profiler
+
+
+def disable():
+    global _profiler
+    if _profiler is not None:
+        _profiler.stop()
+        _profiler.write_report()
+        _profiler = None
+
+
+# --------------------⏱ Stage Timer --------------------
+class StageStats:
+    __slots__ = ("calls", "wall", "cpu", "net_alloc", "peak_alloc", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.net_alloc = 0
+        self.peak_alloc = 0
+        self.samples = 0
+
+
+class _StageTimer:
+    __slots__ = ("profiler", "name", "path", "stack", "wall", "cpu", "mem", "child_peak")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.stack = self.profiler.stack_for_current_thread()
+        self.path = "/".join([timer.name for timer in self.stack] + [self.name])
+        self.stack.append(self)
+        self.child_peak = 0
+        self.mem = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        self.cpu = time.thread_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak - self.mem, self.child_peak)
+        self.stack.pop()
+        if self.stack:
+            # reset_peak() inside this stage hid the peak from the parent
+            parent = self.stack[-1]
+            parent.child_peak = max(parent.child_peak, self.mem - parent.mem + peak)
+
+        stats = self.profiler.stats[self.path]
+        stats.calls += 1
+        stats.wall += wall
+        stats.cpu += cpu
+        stats.net_alloc += current - self.mem
+        stats.peak_alloc = max(stats.peak_alloc, peak)
+        return False
+
+
+# --------------------🧪 Profiler --------------------
+class Profiler:
+    def __init__(self, out_dir: str, interval: float, frames: int):
+        self.out_dir = out_dir
+        self.interval = interval
+        self.frames = frames
+        self.stats: dict[str, StageStats] = defaultdict(StageStats)
+        self.stacks: dict[int, list] = {}
+        self.folded = Counter()
+        self.checkpoints = []
+        self.first_snapshot = None
+        self.last_snapshot = None
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_loop, name="gemini-profiler", daemon=True)
+
+    def stack_for_current_thread(self) -> list:
+        return self.stacks.setdefault(threading.get_ident(), [])
+
+    def start(self):
+        tracemalloc.start(self.frames)
+        self.started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+        self.elapsed = time.perf_counter() - self.started
+        self.last_snapshot = self._snapshot()
+        tracemalloc.stop()
+
+    # --------------------📸 Sampling --------------------
+    def _sample_loop(self):
+        sampler_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id, stack in list(self.stacks.items()):
+                if thread_id == sampler_id or thread_id not in frames:
+                    continue
+                try:
+                    # The owning thread may pop this stack at any moment
+                    timer = stack[-1]
+                except IndexError:
+                    continue
+                self.stats[timer.path].samples += 1
+                self.folded[self._fold(timer.path, frames[thread_id])] += 1
+
+    @staticmethod
+    def _fold(stage_path: str, frame) -> str:
+        calls = []
+        while frame is not None:
+            code = frame.f_code
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            calls.append(f"{module}:{code.co_name}")
+            frame = frame.f_back
+        calls.reverse()
+        # Profiler plumbing is noise in the flamegraph
+        calls = [c for c in calls if not c.startswith("gemini_profile:")]
+        return ";".join(stage_path.split("/") + calls)
+
+    # --------------------📈 Memory Growth --------------------
+    def checkpoint(self, label: str, **gauges):
+        current, _ = tracemalloc.get_traced_memory()
+        self.checkpoints.append({
+            "label": label,
+            "elapsed": round(time.perf_counter() - self.started, 3),
+            "traced_bytes": current,
+            **gauges,
+        })
+        if self.first_snapshot is None:
+            self.first_snapshot = self._snapshot()
+
+    @staticmethod
+    def _snapshot():
+        # Leave the profiler's own bookkeeping out of the growth report
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+
+    def growth_lines(self) -> list[str]:
+        points = [(i, c["traced_bytes"]) for i, c in enumerate(self.checkpoints)]
+        if len(points) < 2:
+            return ["Not enough checkpoints to measure growth (need 2+ turns)."]
+
+        # Least-squares slope of traced memory per checkpoint
+        n = len(points)
+        mean_x = sum(x for x, _ in points) / n
+        mean_y = sum(y for _, y in points) / n
+        var = sum((x - mean_x) ** 2 for x, _ in points)
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / var
+        lines = [
+            f"Checkpoints: {n}",
+            f"Traced memory: {points[0][1] / 1024:.1f} KiB -> {points[-1][1] / 1024:.1f} KiB",
+            f"Growth: {slope / 1024:+.2f} KiB per checkpoint",
+        ]
+        gauges = [k for k in self.checkpoints[-1] if k not in ("label", "elapsed", "traced_bytes")]
+        for gauge in gauges:
+            first, last = self.checkpoints[0].get(gauge), self.checkpoints[-1].get(gauge)
+            if isinstance(first, (int, float)) and isinstance(last, (int, float)) and last != first:
+                per_unit = (points[-1][1] - points[0][1]) / (last - first)
+                lines.append(f"Per {gauge}: {per_unit / 1024:+.2f} KiB")
+
+        if self.first_snapshot and self.last_snapshot:
+            lines.append("\nTop growing allocation sites since the first checkpoint:")
+            diffs = self.last_snapshot.compare_to(self.first_snapshot, "lineno")
+            for diff in diffs[:10]:
+                frame = diff.traceback[0]
+                lines.append(f"  {diff.size_diff / 1024:+9.1f} KiB  {diff.count_diff:+7d} blocks  "
+                             f"{frame.filename}:{frame.lineno}")
+        return lines
+
+    # --------------------📝 Report --------------------
+    def write_report(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        total_samples = sum(s.samples for s in self.stats.values()) or 1
+
+        rows = sorted(self.stats.items(), key=lambda kv: kv[1].wall, reverse=True)
+        header = (f"{'stage':<32} {'calls':>6} {'wall s':>9} {'cpu s':>9} {'mean ms':>9} "
+                  f"{'samples':>8} {'net KiB':>10} {'peak KiB':>10}")
+        lines = [f"Profiled {self.elapsed:.2f}s wall", "", header, "-" * len(header)]
+        for path, s in rows:
+            lines.append(
+                f"{path:<32} {s.calls:>6} {s.wall:>9.3f} {s.cpu:>9.3f} {s.wall / s.calls * 1000:>9.2f} "
+                f"{100 * s.samples / total_samples:>7.1f}% {s.net_alloc / 1024:>10.1f} {s.peak_alloc / 1024:>10.1f}"
+            )
+        growth = self.growth_lines()
+        lines += ["", "Memory growth", "-------------", *growth]
+        report = "\n".join(lines)
+
+        with open(os.path.join(self.out_dir, "stages.txt"), "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+        with open(os.path.join(self.out_dir, "stages.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                path: {name: getattr(s, name) for name in StageStats.__slots__}
+                for path, s in rows
+            }, f, indent=2)
+        with open(os.path.join(self.out_dir, "flamegraph.folded"), "w", encoding="utf-8") as f:
+            for stack, count in self.folded.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(os.path.join(self.out_dir, "memory.csv"), "w", encoding="utf-8") as f:
+            if self.checkpoints:
+                columns = list(dict.fromkeys(k for c in self.checkpoints for k in c))
+                f.write(",".join(columns) + "\n")
+                for c in self.checkpoints:
+                    f.write(",".join(str(c.get(k, "")) for k in columns) + "\n")
+        with open(os.path.join(self.out_dir, "growth.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(growth) + "\n")
+
+        print(f"\n🔬 Profile written to {self.out_dir}/\n")
+        print(report)
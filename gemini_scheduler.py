@@ -0,0 +1,243 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+
+# --------------------🚦 Multi-Tenant Scheduler --------------------
+# Sits in front of upstream Gemini calls so one heavy tenant cannot starve
+# the others when they share a quota.
+#
+#   • Priority classes are strict: interactive (voice, chat) before batch.
+#   • Within a class, tenants share capacity by weighted fair queueing
+#     (start-time fair queueing over each tenant's estimated cost).
+#   • Within a tenant's class queue, jobs run earliest-deadline-first.
+#   • Jobs whose deadline can no longer be met are shed up front at
+#     admission, or dropped when they reach the head of the queue.
+#
+# FairQueue is clock-agnostic (callers pass `now`), so the same code runs the
+# live gateway and the offline simulation in `gemini bench scheduler`.
+
+PRIORITY_CLASSES = {"interactive": 0, "batch": 1}
+
+
+class LoadShed(RuntimeError):
+    """Raised when a request cannot meet its deadline and is rejected."""
+
+
+class Job:
+    __slots__ = ("tenant", "priority", "deadline", "cost", "arrival", "seq",
+                 "payload", "shed_reason")
+
+    def __init__(self, tenant: str, priority: str = "interactive",
+                 deadline: float = math.inf, cost: float = 1.0,
+                 arrival: float = 0.0, payload=None):
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class '{priority}'")
+        self.tenant = tenant
+        self.priority = priority
+        self.deadline = deadline
+        self.cost = cost
+        self.arrival = arrival
+        self.payload = payload
+        self.seq = 0
+        self.shed_reason = None
+
+
+class TenantQueue:
+    __slots__ = ("jobs", "finish_tag", "queued_cost")
+
+    def __init__(self):
+        self.jobs = []          # (deadline, seq, job) — EDF
+        self.finish_tag = 0.0   # virtual finish time of the last job served
+        self.queued_cost = 0.0
+
+
+class ClassQueue:
+    __slots__ = ("virtual_time", "tenants", "active", "queued_cost", "active_weight")
+
+    def __init__(self):
+        self.virtual_time = 0.0
+        self.tenants: dict[str, TenantQueue] = {}
+        self.active = []        # (start_tag, seq, tenant) for backlogged tenants
+        self.queued_cost = 0.0
+        self.active_weight = 0.0
+
+
+# --------------------⚖️ Fair Queue --------------------
+class FairQueue:
+    def __init__(self, weights: dict[str, float] | None = None,
+                 default_weight: float = 1.0, capacity: int = 1):
+        self.weights = dict(weights or {})
+        self.default_weight = default_weight
+        self.capacity = capacity
+        self.classes = [ClassQueue() for _ in PRIORITY_CLASSES]
+        self.shed: list[Job] = []
+        self._seq = itertools.count()
+
+    def weight(self, tenant: str) -> float:
+        return self.weights.get(tenant, self.default_weight)
+
+    def __len__(self):
+        return sum(len(t.jobs) for c in self.classes for t in c.tenants.values())
+
+    # --------------------📥 Admission --------------------
+    def estimated_start(self, job: Job, now: float, slot_wait: float = 0.0) -> float:
+        """Rough time at which `job` would start if admitted now.
+
+        `slot_wait` is how long until the first busy slot frees up (0 if one
+        is idle); queued work ahead of the job only starts after that.
+        """
+        level = PRIORITY_CLASSES[job.priority]
+        ahead = slot_wait + sum(c.queued_cost for c in self.classes[:level]) / self.capacity
+
+        queue = self.classes[level]
+        tenant = queue.tenants.get(job.tenant)
+        weight = self.weight(job.tenant)
+        active_weight = queue.active_weight
+        own_ahead = 0.0
+        if tenant and tenant.jobs:
+            own_ahead = sum(j.cost for _, _, j in tenant.jobs if j.deadline <= job.deadline)
+        else:
+            active_weight += weight
+        # Under WFQ this tenant gets `share` of the class while it is backlogged
+        share = weight / active_weight if active_weight else 1.0
+        return now + ahead + own_ahead / (self.capacity * share)
+
+    def push(self, job: Job, now: float, slot_wait: float = 0.0) -> bool:
+        """Queue `job`, or shed it (returning False) if its deadline is unreachable."""
+        if self.estimated_start(job, now, slot_wait) + job.cost > job.deadline:
+            job.shed_reason = "admission"
+            self.shed.append(job)
+            return False
+
+        job.seq = next(self._seq)
+        queue = self.classes[PRIORITY_CLASSES[job.priority]]
+        tenant = queue.tenants.setdefault(job.tenant, TenantQueue())
+        if not tenant.jobs:
+            self._activate(queue, job.tenant, tenant)
+        heapq.heappush(tenant.jobs, (job.deadline, job.seq, job))
+        tenant.queued_cost += job.cost
+        queue.queued_cost += job.cost
+        return True
+
+    def cancel(self, job: Job, reason: str = "timeout"):
+        """Withdraw a queued job; it is skipped, uncharged, when it reaches the head."""
+        if job.shed_reason is None:
+            job.shed_reason = reason
+            queue = self.classes[PRIORITY_CLASSES[job.priority]]
+            queue.tenants[job.tenant].queued_cost -= job.cost
+            queue.queued_cost -= job.cost
+
+    def _activate(self, queue: ClassQueue, name: str, tenant: TenantQueue):
+        start = max(queue.virtual_time, tenant.finish_tag)
+        heapq.heappush(queue.active, (start, next(self._seq), name))
+        queue.active_weight += self.weight(name)
+
+    # --------------------📤 Dispatch --------------------
+    def pop(self, now: float) -> Job | None:
+        """Next job to run, dropping any that can no longer meet their deadline."""
+        for queue in self.classes:
+            while queue.active:
+                start, _, name = heapq.heappop(queue.active)
+                tenant = queue.tenants[name]
+                queue.active_weight -= self.weight(name)
+                queue.virtual_time = max(queue.virtual_time, start)
+
+                _, _, job = heapq.heappop(tenant.jobs)
+                if job.shed_reason:
+                    # Cancelled while queued; its cost was already released
+                    if tenant.jobs:
+                        self._activate(queue, name, tenant)
+                    continue
+                tenant.queued_cost -= job.cost
+                queue.queued_cost -= job.cost
+
+                if now + job.cost > job.deadline:
+                    # Not charged to the tenant: nothing was served
+                    job.shed_reason = "expired"
+                    self.shed.append(job)
+                    if tenant.jobs:
+                        self._activate(queue, name, tenant)
+                    continue
+
+                tenant.finish_tag = start + job.cost / self.weight(name)
+                if tenant.jobs:
+                    self._activate(queue, name, tenant)
+                return job
+        return None
+
+    def drain_shed(self) -> list[Job]:
+        shed, self.shed = self.shed, []
+        return shed
+
+
+# --------------------🧵 Threaded Scheduler --------------------
+class Scheduler:
+    """Runs callables through a FairQueue with at most `concurrency` in flight.
+
+    Job cost is an EWMA of observed call latency per priority class, so
+    admission control adapts to how slow upstream currently is.
+    """
+
+    def __init__(self, concurrency: int = 8, weights: dict[str, float] | None = None,
+                 initial_estimate: float = 2.0, clock=time.monotonic):
+        self.queue = FairQueue(weights, capacity=concurrency)
+        self.free_slots = concurrency
+        self.estimates = {name: initial_estimate for name in PRIORITY_CLASSES}
+        self.running: dict[Job, float] = {}   # job -> expected finish time
+        self.clock = clock
+        self.lock = threading.Lock()
+
+    def run(self, fn, *, tenant: str = "default", priority: str = "interactive",
+            timeout: float | None = None):
+        """Call `fn()` when scheduled; raise LoadShed if `timeout` seconds can't be met."""
+        now = self.clock()
+        deadline = now + timeout if timeout is not None else math.inf
+        ready = threading.Event()
+        job = Job(tenant, priority, deadline, self.estimates[priority], now, ready)
+
+        with self.lock:
+            admitted = self.queue.push(job, now, self.slot_wait(now))
+            self._dispatch()
+        if not admitted:
+            raise LoadShed(f"Tenant '{tenant}' request cannot finish within {timeout}s")
+
+        # Give up once the job can no longer finish in time, not when it reaches the head
+        if not ready.wait(None if timeout is None else max(0.0, deadline - job.cost - self.clock())):
+            with self.lock:
+                if not ready.is_set():
+                    self.queue.cancel(job)
+                    raise LoadShed(f"Tenant '{tenant}' request expired in the queue")
+        if job.shed_reason:
+            raise LoadShed(f"Tenant '{tenant}' request expired in the queue")
+
+        started = self.clock()
+        try:
+            return fn()
+        finally:
+            elapsed = self.clock() - started
+            with self.lock:
+                del self.running[job]
+                self.estimates[priority] = 0.8 * self.estimates[priority] + 0.2 * elapsed
+                self.free_slots += 1
+                self._dispatch()
+
+    def slot_wait(self, now: float) -> float:
+        # Caller holds the lock
+        if self.free_slots or not self.running:
+            return 0.0
+        return max(0.0, min(self.running.values()) - now)
+
+    def _dispatch(self):
+        # Caller holds the lock
+        now = self.clock()
+        while self.free_slots:
+            job = self.queue.pop(now)
+            if job is None:
+                break
+            self.free_slots -= 1
+            self.running[job] = now + job.cost
+            job.payload.set()
+        for job in self.queue.drain_shed():
+            job.payload.set()
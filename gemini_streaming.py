@@ -1,23 +1,11 @@
 # gemini_streaming.py
 
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
+from gemini_client import get_client
 
-# --------------------🔐 Load API Key --------------------
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("❌ GEMINI_API_KEY not found in .env file.")
-
-# --------------------🤖 Initialize Gemini Client --------------------
-client = OpenAI(
-    api_key=api_key,
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
-)
 
 # --------------------💬 Stream Gemini Response --------------------
 def chat_stream(prompt: str):
+    client = get_client()
     print(f"📤 Sending prompt: {prompt}\n")
     print("📥 Streaming Gemini's response...\n")
 
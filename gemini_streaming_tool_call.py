@@ -1,19 +1,6 @@
-import os
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
+from gemini_client import get_client
 
-# --------------------🔐 Load API Key --------------------
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("❌ GEMINI_API_KEY is missing.")
-
-# --------------------🤖 Initialize Client --------------------
-client = OpenAI(
-    api_key=api_key,
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
-)
 
 # --------------------🌤 Simple Tool --------------------
 def get_current_weather(location: str) -> dict:
@@ -46,6 +33,7 @@ tools = [
 
 # --------------------💬 Streaming + Tool Flow --------------------
 def main():
+    client = get_client()
     print("🧠 Asking Gemini (streaming with tool access)...\n")
 
     messages = [
@@ -1,7 +1,5 @@
-import os
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
+from gemini_client import get_client
 from pydantic import BaseModel, Field, ValidationError
 
 # Step 1: Define the schema for structured output
@@ -10,20 +8,10 @@ class WeatherInfo(BaseModel):
     temp_c: float = Field(..., description="Temperature in Celsius")
     condition: str = Field(..., description="Weather condition")
 
-# Step 2: Load Gemini API key
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("GEMINI_API_KEY not found in environment variables.")
 
-# Step 3: Create Gemini-compatible OpenAI client
-client = OpenAI(
-    api_key=api_key,
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
-)
-
-# Step 4: Main logic
+# Step 2: Main logic
 def main():
+    client = get_client()
     print("⏳ Requesting structured weather data from Gemini...")
 
     response = client.chat.completions.create(
@@ -56,6 +44,6 @@ def main():
         print("\n❌ Validation failed:")
         print(e)
 
-# Step 5: Run the script
+# Step 3: Run the script
 if __name__ == "__main__":
     main()
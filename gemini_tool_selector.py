@@ -0,0 +1,230 @@
+import json
+import re
+import time
+import zlib
+import numpy as np
+
+# --------------------🧰 Tool Subset Selection --------------------
+# With hundreds of registered tools, sending every schema on every call
+# bloats the prompt and slows the model down. ToolSelector embeds each tool's
+# name, description and parameter names once into a row of a NumPy matrix,
+# scores the current conversation against all rows with one mat-vec, and
+# sends only the top-k tools plus any pinned ones.
+#
+# Embeddings are local and dependency-free: hashed word, word-bigram and
+# character-trigram features (the "hashing trick"), L2-normalized, so the
+# score is a cosine similarity. They only see shared wording, so two safety
+# valves cover requests phrased unlike any tool:
+#   - when no tool scores at least MIN_SCORE, the full list is sent;
+#   - the subset carries a `search_tools` meta-tool the model can call to
+#     describe what it needs in its own words and get those schemas added.
+
+EMBEDDING_DIM = 1024
+RECENT_MESSAGES = 4
+# Cosine below which the best match is treated as a guess. Measured on
+# `bench tools`: tool-worded queries score 0.33-0.59, paraphrases 0.16-0.31.
+MIN_SCORE = 0.35
+MAX_SEARCHES = 2
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+SEARCH_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "search_tools",
+        "description": (
+            "Only some tools are listed. If none of them can do what the user "
+            "asked, call this to find more; they will be added to your tools."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "The capability needed, e.g. 'weather forecast for a city'",
+                },
+            },
+            "required": ["query"],
+        },
+    },
+}
+
+
+# --------------------🔢 Local Embeddings --------------------
+def features(text: str) -> list[str]:
+    # snake_case and camelCase names should match plain words
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text).replace("_", " ").lower()
+    words = TOKEN_RE.findall(text)
+    feats = list(words)
+    feats += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"#{word}#"
+        feats += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    return feats
+
+
+def embed_texts(texts: list[str], dim: int = EMBEDDING_DIM) -> np.ndarray:
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for feat in features(text):
+            h = zlib.crc32(feat.encode())
+            # The top bit picks a sign so colliding features tend to cancel
+            matrix[row, h % dim] += 1.0 if h & 0x80000000 else -1.0
+    # Sublinear term frequency so repeated words don't dominate
+    matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def tool_text(tool: dict) -> str:
+    function = tool["function"]
+    params = function.get("parameters", {}).get("properties", {})
+    parts = [function["name"], function.get("description", "")]
+    for name, schema in params.items():
+        parts.append(name)
+        parts.append(schema.get("description", ""))
+    return " ".join(parts)
+
+
+def estimate_tokens(tool: dict) -> int:
+    # ~4 characters per token is close enough for a savings report
+    return len(json.dumps(tool)) // 4
+
+
+def message_text(message) -> tuple[str, str]:
+    if isinstance(message, dict):
+        return message.get("role", ""), message.get("content") or ""
+    return getattr(message, "role", ""), getattr(message, "content", None) or ""
+
+
+def call_function(call) -> tuple[str, str]:
+    """(name, JSON arguments) of an SDK or dict tool call."""
+    function = call["function"] if isinstance(call, dict) else call.function
+    if isinstance(function, dict):
+        return function["name"], function.get("arguments") or "{}"
+    return function.name, function.arguments or "{}"
+
+
+# --------------------🎯 Selector --------------------
+class ToolSelector:
+    def __init__(self, tools: list[dict], k: int = 8, pinned=(), dim: int = EMBEDDING_DIM,
+                 min_score: float = MIN_SCORE):
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        self.tools = tools
+        self.k = k
+        self.dim = dim
+        self.min_score = min_score
+        self.names = [tool["function"]["name"] for tool in tools]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        unknown = set(pinned) - set(self.index)
+        if unknown:
+            raise ValueError(f"Pinned tools not in the registry: {sorted(unknown)}")
+        self.pinned = np.array(sorted(self.index[name] for name in pinned), dtype=np.intp)
+        self.matrix = embed_texts([tool_text(tool) for tool in tools], dim)
+        self.tokens = np.array([estimate_tokens(tool) for tool in tools])
+        self.stats = {"selections": 0, "full_lists": 0, "searches": 0, "fallbacks": 0,
+                      "tokens_full": 0, "tokens_sent": 0, "select_seconds": 0.0}
+
+    def query_text(self, messages) -> str:
+        # Recent user/tool turns matter most; the latest user turn counts twice
+        recent = [message_text(m) for m in list(messages)[-RECENT_MESSAGES:]]
+        texts = [content for role, content in recent if role in ("user", "tool") and content]
+        if texts:
+            texts.append(texts[-1])
+        return " ".join(texts)
+
+    def select_indices(self, messages) -> np.ndarray:
+        if len(self.tools) <= self.k:
+            return np.arange(len(self.tools))
+        scores = self.scores(self.query_text(messages))
+        if scores.max() < self.min_score:
+            # Nothing matches well enough to leave tools out
+            self.stats["full_lists"] += 1
+            return np.arange(len(self.tools))
+        top = np.argpartition(scores, -self.k)[-self.k:]
+        # Keep registry order so the tools list is stable across turns
+        return np.union1d(top, self.pinned)
+
+    def scores(self, text: str) -> np.ndarray:
+        return self.matrix @ embed_texts([text], self.dim)[0]
+
+    def select(self, messages) -> list[dict]:
+        start = time.perf_counter()
+        chosen = self.select_indices(messages)
+        self.stats["select_seconds"] += time.perf_counter() - start
+        self.stats["selections"] += 1
+        self.stats["tokens_full"] += int(self.tokens.sum())
+        self.stats["tokens_sent"] += int(self.tokens[chosen].sum())
+        return [self.tools[i] for i in chosen]
+
+    def search(self, query: str) -> list[dict]:
+        """The k tools that best match a capability the model described."""
+        self.stats["searches"] += 1
+        scores = self.scores(query)
+        top = np.argsort(scores)[::-1][:self.k]
+        return [self.tools[i] for i in top if scores[i] > 0]
+
+    def missing(self, tool_calls, selected: list[dict]) -> list[dict]:
+        """Registered tools the model called that were not in `selected`."""
+        sent = {tool["function"]["name"] for tool in selected}
+        wanted = []
+        for call in tool_calls or []:
+            name, _ = call_function(call)
+            if name not in sent and name in self.index:
+                sent.add(name)
+                wanted.append(self.tools[self.index[name]])
+        return wanted
+
+    def report(self) -> str:
+        n = self.stats["selections"] or 1
+        full, sent = self.stats["tokens_full"], self.stats["tokens_sent"]
+        saved = 100 * (1 - sent / full) if full else 0.0
+        return (f"🧰 Tool selection: {len(self.tools)} registered, k={self.k}, "
+                f"~{sent // n} of ~{full // n} tool tokens per call ({saved:.0f}% saved), "
+                f"{self.stats['select_seconds'] / n * 1000:.2f} ms per selection, "
+                f"{self.stats['full_lists']} full lists sent, {self.stats['searches']} tool "
+                f"searches, {self.stats['fallbacks']} fallback re-queries")
+
+
+# --------------------🔁 Completion With Fallback --------------------
+def create_with_tools(client, selector: ToolSelector, messages, **kwargs):
+    """chat.completions.create with a selected tool subset.
+
+    While tools are left out, the model is also offered `search_tools`. If it
+    calls that, or calls a registered tool that was left out of the subset,
+    the request is repeated with the found or called tools added. The last
+    attempt goes without `search_tools`, so the reply never asks for it.
+    """
+    tools = selector.select(messages)
+    search_name = SEARCH_TOOL["function"]["name"]
+    searchable = search_name not in selector.index
+    for attempt in range(MAX_SEARCHES + 1):
+        offer_search = searchable and attempt < MAX_SEARCHES and len(tools) < len(selector.tools)
+        offered = tools + [SEARCH_TOOL] if offer_search else tools
+        response = client.chat.completions.create(messages=messages, tools=offered, **kwargs)
+        calls = response.choices[0].message.tool_calls or []
+
+        added = selector.missing(calls, tools)
+        if added:
+            selector.stats["fallbacks"] += 1
+        searched = False
+        for call in calls:
+            name, arguments = call_function(call)
+            if not offer_search or name != search_name:
+                continue
+            searched = True
+            try:
+                query = json.loads(arguments).get("query") or ""
+            except (ValueError, AttributeError):
+                query = ""
+            known = {tool["function"]["name"] for tool in tools + added}
+            added += [tool for tool in selector.search(query) if tool["function"]["name"] not in known]
+
+        if not added and not searched:
+            break
+        if not added:
+            # The search found nothing new; ask again without offering it
+            searchable = False
+        tools = tools + added
+    return response, tools
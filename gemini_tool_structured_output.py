@@ -1,19 +1,7 @@
-import os
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
+from gemini_client import get_client
 from pydantic import BaseModel, Field, ValidationError
 
-# --------------------🔐 Load API Key --------------------
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("❌ GEMINI_API_KEY is missing.")
-
-client = OpenAI(
-    api_key=api_key,
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
-)
 
 # --------------------📦 Final Structured Schema --------------------
 class WeatherSummary(BaseModel):
@@ -45,6 +33,7 @@ tools = [
 
 # --------------------💬 Full Flow --------------------
 def main():
+    client = get_client()
     # Step 1: Ask Gemini with tools only
     messages = [
         {"role": "system", "content": "You are a helpful assistant."},
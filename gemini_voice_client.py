@@ -1,8 +1,7 @@
-import os
-import openai
 import speech_recognition as sr
 import pyttsx3
-from dotenv import load_dotenv
+from gemini_client import get_client
+from gemini_profile import checkpoint, stage
 from multiprocessing import Process, Queue
 
 # Global voice setup
@@ -37,54 +36,52 @@ def speak_text(text: str, voice_id: str):
 def main():
     global VOICE_ID
 
-    load_dotenv()
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    if not GEMINI_API_KEY:
-        raise ValueError("❌ GEMINI_API_KEY not found in .env")
+    # Initialize Gemini client (fails fast if the key is missing)
+    client = get_client()
 
     VOICE_ID = choose_voice()
 
-    # Initialize Gemini client
-    client = openai.OpenAI(
-        api_key=GEMINI_API_KEY,
-        base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
-    )
-
     recognizer = sr.Recognizer()
     mic = sr.Microphone()
 
     print("\n🎤 Gemini Voice Assistant (say 'exit' to stop)\n")
 
     while True:
-        with mic as source:
+        checkpoint("turn")
+        with mic as source, stage("audio capture"):
             print("👂 Listening...")
             recognizer.adjust_for_ambient_noise(source)
             audio = recognizer.listen(source)
 
         try:
-            user_input = recognizer.recognize_google(audio)
+            with stage("recognition"):
+                user_input = recognizer.recognize_google(audio)
             print(f"👤 You: {user_input}")
 
             if "exit" in user_input.lower():
                 print("👋 Exiting...")
                 break
 
-            # Send to Gemini
-            response = client.chat.completions.create(
-                model="gemini-2.5-flash",
-                messages=[
-                    {"role": "system", "content": "You are a helpful voice assistant."},
-                    {"role": "user", "content": user_input}
-                ]
-            )
+            # Send to Gemini (raw response first so parsing is timed separately)
+            with stage("network"):
+                raw = client.chat.completions.with_raw_response.create(
+                    model="gemini-2.5-flash",
+                    messages=[
+                        {"role": "system", "content": "You are a helpful voice assistant."},
+                        {"role": "user", "content": user_input}
+                    ]
+                )
+            with stage("validation"):
+                response = raw.parse()
 
             reply = response.choices[0].message.content
             print(f"🤖 Gemini: {reply}")
 
             # Use a separate process for TTS with selected voice
-            p = Process(target=speak_text, args=(reply, VOICE_ID))
-            p.start()
-            p.join()
+            with stage("tts"):
+                p = Process(target=speak_text, args=(reply, VOICE_ID))
+                p.start()
+                p.join()
 
         except sr.UnknownValueError:
             print("⚠️ Could not understand audio.")
@@ -0,0 +1,480 @@
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+from gemini_client import MODEL, get_async_client
+
+# --------------------📡 Remote Voice Assistant --------------------
+# `gemini voice --serve` hosts many voice sessions over websockets. Each
+# session is a full-duplex asyncio pipeline:
+#
+#   client mic ──μ-law frames──▶ VAD ─▶ recognition ─▶ streaming completion
+#                                                              │ sentences
+#   client speaker ◀──μ-law audio chunks── chunked TTS ◀───────┘
+#
+# Speech starting while a reply is still generating or playing is barge-in:
+# the reply task is cancelled (stopping generation and TTS) and the client is
+# told to drop any audio it has buffered.
+#
+# Wire protocol, all audio 8-bit μ-law (G.711) mono at SAMPLE_RATE:
+#   client → server  binary   mic audio, any frame size (20 ms recommended)
+#                    text     {"type": "flush"}  end the utterance now
+#                             {"type": "bye"}    close the session
+#   server → client  text     {"type": "ready" | "speech_start" | "transcript" |
+#                              "reply" | "audio_start" | "audio_end" |
+#                              "interrupted" | "done" | "error", "turn": n, ...}
+#                    binary   reply audio, between audio_start and audio_end
+#
+# Clients are expected to run echo cancellation, or the assistant's own voice
+# coming back through the mic will barge in on itself.
+
+SAMPLE_RATE = 16_000
+FRAME_MS = 20
+AUDIO_CHUNK = SAMPLE_RATE // 10      # 100 ms of μ-law audio per binary message
+MAX_MESSAGE = 1 << 20
+MAX_HISTORY = 20                     # messages kept per session, besides the system prompt
+
+SYSTEM_PROMPT = (
+    "You are a helpful voice assistant. Answer in short spoken sentences "
+    "without markdown, lists or emoji."
+)
+
+
+# --------------------🎛 μ-law Codec --------------------
+MULAW_BIAS = 0x84
+MULAW_CLIP = 32635
+
+
+def _mulaw_tables() -> tuple[np.ndarray, np.ndarray]:
+    codes = np.arange(256, dtype=np.int32)
+    inverted = ~codes & 0xFF
+    exponent = (inverted >> 4) & 0x07
+    magnitude = ((((inverted & 0x0F) << 3) + MULAW_BIAS) << exponent) - MULAW_BIAS
+    decode = np.where(inverted & 0x80, -magnitude, magnitude).astype(np.int16)
+
+    samples = np.arange(-32768, 32768, dtype=np.int32)
+    magnitude = np.minimum(np.abs(samples), MULAW_CLIP) + MULAW_BIAS
+    exponent = np.floor(np.log2(magnitude)).astype(np.int32) - 7
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    sign = (samples < 0).astype(np.int32) << 7
+    # Indexed by the sample's bit pattern, so encoding is one table lookup
+    encode = np.empty(65536, dtype=np.uint8)
+    encode[samples.astype(np.uint16)] = ~(sign | exponent << 4 | mantissa) & 0xFF
+    return decode, encode
+
+
+MULAW_DECODE, MULAW_ENCODE = _mulaw_tables()
+
+
+def mulaw_decode(data: bytes) -> np.ndarray:
+    return MULAW_DECODE[np.frombuffer(data, dtype=np.uint8)]
+
+
+def mulaw_encode(pcm: np.ndarray) -> bytes:
+    return MULAW_ENCODE[pcm.astype(np.int16).view(np.uint16)].tobytes()
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    if src_rate == dst_rate or not len(samples):
+        return samples.astype(np.int16)
+    positions = np.arange(int(len(samples) * dst_rate / src_rate)) * (src_rate / dst_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+
+
+def load_audio(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Read any soundfile-supported file as mono int16 at `sample_rate`."""
+    import soundfile
+
+    samples, rate = soundfile.read(path, dtype="int16", always_2d=True)
+    return resample(samples.mean(axis=1), rate, sample_rate)
+
+
+# --------------------🎚 Voice Activity Detection --------------------
+class EnergyVAD:
+    """Frame-energy VAD with an adaptive noise floor.
+
+    Speech starts after `start_ms` of voiced frames and ends after `end_ms`
+    of silence. The `preroll_ms` before the start is kept so the first
+    syllable is not clipped from the utterance.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, frame_ms: int = FRAME_MS,
+                 start_ms: int = 60, end_ms: int = 600, preroll_ms: int = 300,
+                 max_ms: int = 30_000, min_rms: float = 300.0, ratio: float = 3.0):
+        self.frame = sample_rate * frame_ms // 1000
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.end_frames = max(1, end_ms // frame_ms)
+        self.max_frames = max_ms // frame_ms
+        self.min_rms = min_rms
+        self.ratio = ratio
+        self.noise_floor = min_rms / ratio
+        self.pending = np.zeros(0, dtype=np.int16)
+        self.preroll = deque(maxlen=max(1, preroll_ms // frame_ms))
+        self.utterance: list[np.ndarray] | None = None
+        self.voiced_run = 0
+        self.silent_run = 0
+
+    @property
+    def in_speech(self) -> bool:
+        return self.utterance is not None
+
+    def feed(self, pcm: np.ndarray) -> list[tuple[str, bytes | None]]:
+        """Consume samples; return ("start", None) and ("end", utterance) events."""
+        self.pending = np.concatenate((self.pending, pcm))
+        usable = len(self.pending) - len(self.pending) % self.frame
+        events = []
+        for frame in self.pending[:usable].reshape(-1, self.frame):
+            event = self._frame(frame)
+            if event:
+                events.append(event)
+        self.pending = self.pending[usable:]
+        return events
+
+    def flush(self) -> list[tuple[str, bytes | None]]:
+        if not self.in_speech:
+            return []
+        return [self._finish()]
+
+    def _frame(self, frame: np.ndarray):
+        rms = float(np.sqrt(np.mean(frame.astype(np.float32) ** 2)))
+        voiced = rms > max(self.min_rms, self.noise_floor * self.ratio)
+
+        if not self.in_speech:
+            self.preroll.append(frame)
+            if not voiced:
+                self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+            self.voiced_run = self.voiced_run + 1 if voiced else 0
+            if self.voiced_run >= self.start_frames:
+                self.utterance = list(self.preroll)
+                self.preroll.clear()
+                self.silent_run = 0
+                return ("start", None)
+            return None
+
+        self.utterance.append(frame)
+        self.silent_run = 0 if voiced else self.silent_run + 1
+        if self.silent_run >= self.end_frames or len(self.utterance) >= self.max_frames:
+            return self._finish()
+        return None
+
+    def _finish(self) -> tuple[str, bytes]:
+        # Keep a little trailing silence; recognizers like a soft ending
+        keep = len(self.utterance) - max(0, self.silent_run - 5)
+        pcm = np.concatenate(self.utterance[:keep]).tobytes()
+        self.utterance = None
+        self.voiced_run = self.silent_run = 0
+        return ("end", pcm)
+
+
+# --------------------✂️ Sentence Chunking --------------------
+SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+|\n+")
+
+
+class SentenceChunker:
+    """Turn streamed text deltas into sentences that are worth a TTS call."""
+
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, delta: str) -> list[str]:
+        self.buffer += delta
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            # Short fragments ("Sure.") ride along with the next sentence
+            if match.start() - start >= self.min_chars:
+                sentences.append(self.buffer[start:match.start()].strip())
+                start = match.end()
+        self.buffer = self.buffer[start:]
+        return [s for s in sentences if s]
+
+    def flush(self) -> list[str]:
+        rest, self.buffer = self.buffer.strip(), ""
+        return [rest] if rest else []
+
+
+# --------------------🔌 Backends --------------------
+def recognize_pcm(pcm: bytes, sample_rate: int) -> str:
+    import speech_recognition as sr
+
+    try:
+        return sr.Recognizer().recognize_google(sr.AudioData(pcm, sample_rate, 2))
+    except sr.UnknownValueError:
+        return ""
+
+
+_tts_engine = None
+
+
+def synthesize_pcm(text: str, voice_id: str | None, sample_rate: int) -> bytes:
+    # Runs in a TTS worker process; the engine is created once per worker
+    global _tts_engine
+    import pyttsx3
+
+    if _tts_engine is None:
+        _tts_engine = pyttsx3.init()
+        _tts_engine.setProperty("rate", 170)
+        if voice_id:
+            _tts_engine.setProperty("voice", voice_id)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "speech.wav")
+        _tts_engine.save_to_file(text, path)
+        _tts_engine.runAndWait()
+        return load_audio(path, sample_rate).tobytes()
+
+
+class GeminiVoiceBackend:
+    """Google recognition, streaming Gemini completions and pyttsx3 speech.
+
+    Recognition is blocking network I/O, so it runs on a thread pool.
+    pyttsx3 is neither thread-safe nor fast, so synthesis runs in a pool of
+    worker processes shared by every session.
+    """
+
+    def __init__(self, model: str = MODEL, voice_id: str | None = None,
+                 recognizer_threads: int = 32, tts_workers: int = 2):
+        self.model = model
+        self.voice_id = voice_id
+        self.asr_pool = ThreadPoolExecutor(recognizer_threads, thread_name_prefix="recognize")
+        self.tts_pool = ProcessPoolExecutor(tts_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def recognize(self, pcm: bytes, sample_rate: int) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.asr_pool, recognize_pcm, pcm, sample_rate)
+
+    async def stream_reply(self, messages: list[dict]):
+        stream = await get_async_client().chat.completions.create(
+            model=self.model, messages=messages, stream=True,
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # On barge-in this drops the upstream connection mid-generation
+            await stream.close()
+
+    async def synthesize(self, text: str, sample_rate: int) -> bytes:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.tts_pool, synthesize_pcm, text, self.voice_id, sample_rate)
+
+    def close(self):
+        self.asr_pool.shutdown(wait=False, cancel_futures=True)
+        self.tts_pool.shutdown(wait=False, cancel_futures=True)
+
+
+LOCAL_REPLY = (
+    "This is the offline voice backend. It streams a fixed reply word by word. "
+    "Every sentence is synthesized as a short tone so the audio path is exercised end to end."
+)
+
+
+class LocalVoiceBackend:
+    """Offline stand-in with fixed latencies, used for benchmarks and dry runs."""
+
+    def __init__(self, recognize_delay: float = 0.15, first_token_delay: float = 0.25,
+                 token_delay: float = 0.02, tts_delay: float = 0.05):
+        self.recognize_delay = recognize_delay
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.tts_delay = tts_delay
+
+    async def recognize(self, pcm: bytes, sample_rate: int) -> str:
+        await asyncio.sleep(self.recognize_delay)
+        return f"a {len(pcm) / 2 / sample_rate:.1f} second utterance"
+
+    async def stream_reply(self, messages: list[dict]):
+        await asyncio.sleep(self.first_token_delay)
+        for word in LOCAL_REPLY.split(" "):
+            yield word + " "
+            await asyncio.sleep(self.token_delay)
+
+    async def synthesize(self, text: str, sample_rate: int) -> bytes:
+        await asyncio.sleep(self.tts_delay)
+        seconds = 0.06 * len(text.split())
+        t = np.arange(int(seconds * sample_rate)) / sample_rate
+        return (8000 * np.sin(2 * np.pi * 220 * t)).astype(np.int16).tobytes()
+
+    def close(self):
+        pass
+
+
+# --------------------🗣 Voice Session --------------------
+class VoiceSession:
+    def __init__(self, connection, backend, system: str = SYSTEM_PROMPT,
+                 sample_rate: int = SAMPLE_RATE):
+        self.ws = connection
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.vad = EnergyVAD(sample_rate)
+        self.system = {"role": "system", "content": system}
+        self.history: list[dict] = []
+        self.response: asyncio.Task | None = None
+        self.playback_end = 0.0     # when the client should finish playing what we sent
+        self.turn = 0
+
+    async def send(self, event: dict):
+        await self.ws.send(json.dumps(event))
+
+    async def run(self):
+        await self.send({"type": "ready", "sample_rate": self.sample_rate, "encoding": "mulaw"})
+        try:
+            async for message in self.ws:
+                if isinstance(message, bytes):
+                    events = self.vad.feed(mulaw_decode(message))
+                else:
+                    try:
+                        control = json.loads(message).get("type")
+                    except (ValueError, AttributeError):
+                        # A bad control frame is the client's bug, not a reason to hang up
+                        await self.send({"type": "error", "error": "control frames must be JSON objects"})
+                        continue
+                    if control == "bye":
+                        break
+                    events = self.vad.flush() if control == "flush" else []
+                for event, pcm in events:
+                    if event == "start":
+                        await self.on_speech_start()
+                    else:
+                        self.on_speech_end(pcm)
+        finally:
+            await self.cancel_response()
+
+    async def on_speech_start(self):
+        # Barge-in: still generating, or the client is still playing the reply
+        if (self.response and not self.response.done()) or time.monotonic() < self.playback_end:
+            await self.cancel_response()
+            self.playback_end = 0.0
+            await self.send({"type": "interrupted", "turn": self.turn})
+        await self.send({"type": "speech_start", "turn": self.turn + 1})
+
+    def on_speech_end(self, pcm: bytes):
+        self.turn += 1
+        self.response = asyncio.create_task(self.respond(self.turn, pcm, time.perf_counter()))
+
+    async def cancel_response(self):
+        task, self.response = self.response, None
+        if task and not task.done():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    # --------------------🔁 One Turn --------------------
+    async def respond(self, turn: int, pcm: bytes, heard_at: float):
+        """Recognize `pcm`, stream the reply as text and audio; cancelled on barge-in."""
+        timings = {}
+
+        def mark(name: str):
+            timings.setdefault(name, round((time.perf_counter() - heard_at) * 1000, 1))
+
+        try:
+            text = await self.backend.recognize(pcm, self.sample_rate)
+            mark("transcript_ms")
+            await self.send({"type": "transcript", "turn": turn, "text": text})
+            if text:
+                await self.reply(turn, text, mark)
+            mark("done_ms")
+            await self.send({"type": "done", "turn": turn, "timings": timings})
+        except ConnectionClosed:
+            pass
+        except Exception as e:
+            print(f"❌ Voice turn {turn} failed: {e}")
+            with contextlib.suppress(ConnectionClosed):
+                await self.send({"type": "error", "turn": turn, "error": str(e)})
+
+    async def reply(self, turn: int, text: str, mark):
+        self.history.append({"role": "user", "content": text})
+        sentences = asyncio.Queue()
+        speaker = asyncio.create_task(self.speak(turn, sentences, mark))
+        chunker = SentenceChunker()
+        reply = []
+        try:
+            async for delta in self.backend.stream_reply([self.system, *self.history]):
+                mark("first_token_ms")
+                reply.append(delta)
+                await self.send({"type": "reply", "turn": turn, "text": delta})
+                for sentence in chunker.feed(delta):
+                    sentences.put_nowait(sentence)
+            for sentence in chunker.flush():
+                sentences.put_nowait(sentence)
+            sentences.put_nowait(None)
+            await speaker
+        finally:
+            speaker.cancel()
+            # An interrupted reply is kept as far as it got, so the model
+            # knows what the user already heard part of
+            if reply:
+                self.history.append({"role": "assistant", "content": "".join(reply)})
+            del self.history[:-MAX_HISTORY]
+
+    async def speak(self, turn: int, sentences: asyncio.Queue, mark):
+        started = False
+        while (sentence := await sentences.get()) is not None:
+            audio = mulaw_encode(np.frombuffer(await self.backend.synthesize(sentence, self.sample_rate),
+                                               dtype=np.int16))
+            if not started:
+                mark("first_audio_ms")
+                await self.send({"type": "audio_start", "turn": turn, "sample_rate": self.sample_rate})
+                started = True
+            for start in range(0, len(audio), AUDIO_CHUNK):
+                await self.ws.send(audio[start:start + AUDIO_CHUNK])
+            self.playback_end = max(self.playback_end, time.monotonic()) + len(audio) / self.sample_rate
+        if started:
+            await self.send({"type": "audio_end", "turn": turn})
+
+
+# --------------------🌐 Server --------------------
+class VoiceServer:
+    def __init__(self, backend, max_sessions: int = 64, system: str = SYSTEM_PROMPT):
+        self.backend = backend
+        self.max_sessions = max_sessions
+        self.system = system
+        self.sessions = 0
+
+    async def handler(self, connection):
+        if self.sessions >= self.max_sessions:
+            await connection.close(1013, "Voice server is at session capacity")
+            return
+        self.sessions += 1
+        try:
+            await VoiceSession(connection, self.backend, self.system).run()
+        except ConnectionClosed:
+            pass
+        finally:
+            self.sessions -= 1
+
+    async def start(self, host: str, port: int):
+        # μ-law is already compressed; permessage-deflate would only cost CPU
+        return await serve(self.handler, host, port, compression=None, max_size=MAX_MESSAGE)
+
+
+async def serve_voice(host: str, port: int, backend, max_sessions: int):
+    server = await VoiceServer(backend, max_sessions).start(host, port)
+    print(f"🎙️ Voice server listening on ws://{host}:{port} (up to {max_sessions} sessions)")
+    await server.serve_forever()
+
+
+# --------------------🚀 Entry Point --------------------
+def main(args) -> int:
+    if args.local:
+        backend = LocalVoiceBackend()
+    else:
+        get_async_client()  # fail fast on a missing API key
+        backend = GeminiVoiceBackend(model=args.model, tts_workers=args.tts_workers)
+    try:
+        asyncio.run(serve_voice(args.host, args.port, backend, args.max_sessions))
+    except KeyboardInterrupt:
+        print("\n👋 Voice server stopped.")
+    finally:
+        backend.close()
+    return 0
@@ -0,0 +1,149 @@
+import json
+
+import pytest
+
+from gemini_batch import LocalBatchBackend, load_checkpoint, run_batch_job
+
+
+def write_input(path, n):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            f.write(json.dumps({"id": f"q{i}", "prompt": f"question {i}"}) + "\n")
+
+
+def read_output(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def run(tmp_path, backend, system=None, shard_size=3):
+    return run_batch_job(
+        str(tmp_path / "in.jsonl"),
+        str(tmp_path / "out.jsonl"),
+        str(tmp_path / "work"),
+        shard_size=shard_size,
+        system=system,
+        backend=backend,
+        max_in_flight=10,
+        poll_interval=0.001,
+        max_poll_interval=0.001,
+    )
+
+
+class RecordingBackend(LocalBatchBackend):
+    """Counts submissions and lets a test decide how long each batch takes."""
+
+    def __init__(self, store_dir, polls_for=None, fail_first=()):
+        super().__init__(store_dir)
+        self.submitted = []
+        self.shard_of = {}   # batch id -> (attempt number, shard path)
+        self.polls_for = polls_for or {}
+        self.fail_first = set(fail_first)
+
+    def submit(self, path):
+        batch_id = super().submit(path)
+        self.submitted.append(path)
+        self.shard_of[batch_id] = self.submitted.count(path), path
+        return batch_id
+
+    def poll(self, batch_id):
+        attempt, path = self.shard_of[batch_id]
+        shard = int(path.rsplit("-", 1)[1].split(".")[0])
+        self.polls[batch_id] = self.polls.get(batch_id, 0) + 1
+        if self.polls[batch_id] < self.polls_for.get(shard, 1):
+            return {"status": "in_progress", "output_file_id": None, "error_file_id": None}
+        if shard in self.fail_first and attempt == 1:
+            return {"status": "failed", "output_file_id": None, "error_file_id": None}
+        self.polls[batch_id] = self.polls_to_complete
+        return super().poll(batch_id)
+
+
+def test_results_follow_input_order_when_shards_finish_out_of_order(tmp_path):
+    write_input(tmp_path / "in.jsonl", 10)
+    # Shard 0 finishes last; LocalBatchBackend also reverses lines within a shard
+    backend = RecordingBackend(str(tmp_path / "store"), polls_for={0: 5, 1: 3, 2: 1, 3: 2})
+
+    assert run(tmp_path, backend) == 0
+
+    results = read_output(tmp_path / "out.jsonl")
+    assert [r["index"] for r in results] == list(range(10))
+    assert [r["id"] for r in results] == [f"q{i}" for i in range(10)]
+    assert all(r["error"] is None for r in results)
+    assert results[7]["response"]["choices"][0]["message"]["content"] == "echo: question 7"
+
+
+def test_resume_skips_completed_shards(tmp_path):
+    write_input(tmp_path / "in.jsonl", 9)
+
+    class Crash(Exception):
+        pass
+
+    class CrashingBackend(RecordingBackend):
+        def poll(self, batch_id):
+            # Shard 0 completes, then the process "dies" while shards 1-2 are in flight
+            if self.shard_of[batch_id][1].endswith("shard-00000.jsonl"):
+                return super().poll(batch_id)
+            if load_checkpoint(str(tmp_path / "work"))["shards"][0]["status"] == "completed":
+                raise Crash()
+            return {"status": "in_progress", "output_file_id": None, "error_file_id": None}
+
+    with pytest.raises(Crash):
+        run(tmp_path, CrashingBackend(str(tmp_path / "store")))
+
+    state = load_checkpoint(str(tmp_path / "work"))
+    assert [s["status"] for s in state["shards"]] == ["completed", "submitted", "submitted"]
+
+    # In-flight batches are polled again, not resubmitted; completed shards are left alone
+    backend = RecordingBackend(str(tmp_path / "store"))
+    backend.shard_of = {s["batch_id"]: (2, s["path"]) for s in state["shards"]}
+    assert run(tmp_path, backend) == 0
+    assert backend.submitted == []
+    assert [r["index"] for r in read_output(tmp_path / "out.jsonl")] == list(range(9))
+
+
+def test_failed_shards_are_resubmitted_on_rerun(tmp_path):
+    write_input(tmp_path / "in.jsonl", 6)
+    backend = RecordingBackend(str(tmp_path / "store"), fail_first={1})
+
+    assert run(tmp_path, backend) == 1
+    results = read_output(tmp_path / "out.jsonl")
+    assert [r["error"] for r in results[3:]] == ["batch failed"] * 3
+    assert all(r["error"] is None for r in results[:3])
+
+    assert run(tmp_path, backend) == 0
+    assert [p.rsplit("/", 1)[1] for p in backend.submitted] == [
+        "shard-00000.jsonl", "shard-00001.jsonl", "shard-00001.jsonl",
+    ]
+    assert all(r["error"] is None for r in read_output(tmp_path / "out.jsonl"))
+
+
+@pytest.mark.parametrize("change", ["system", "same_size_edit"])
+def test_changed_job_is_resharded(tmp_path, change):
+    write_input(tmp_path / "in.jsonl", 6)
+    backend = RecordingBackend(str(tmp_path / "store"))
+    assert run(tmp_path, backend, system="Be brief.") == 0
+
+    system = "Be brief."
+    if change == "system":
+        system = "Be verbose."
+    else:
+        text = (tmp_path / "in.jsonl").read_text(encoding="utf-8")
+        (tmp_path / "in.jsonl").write_text(text.replace("question 4", "question 9"), encoding="utf-8")
+
+    assert run(tmp_path, backend, system=system) == 0
+    assert len(backend.submitted) == 4  # both shards submitted again
+    state = load_checkpoint(str(tmp_path / "work"))
+    assert state["system"] == system
+    if change == "same_size_edit":
+        results = read_output(tmp_path / "out.jsonl")
+        assert results[4]["response"]["choices"][0]["message"]["content"] == "echo: question 9"
+
+
+@pytest.mark.parametrize("option", [{"shard_size": 0}, {"max_in_flight": 0}])
+def test_rejects_non_positive_sizes(tmp_path, option):
+    write_input(tmp_path / "in.jsonl", 4)
+    kwargs = {"backend": LocalBatchBackend(str(tmp_path / "store")), **option}
+    with pytest.raises(ValueError, match="at least 1"):
+        run_batch_job(str(tmp_path / "in.jsonl"), str(tmp_path / "out.jsonl"),
+                      str(tmp_path / "work"), **kwargs)
+    assert not (tmp_path / "work").exists()
@@ -0,0 +1,95 @@
+import json
+import re
+from types import SimpleNamespace
+
+from pydantic import BaseModel
+
+import gemini_extract
+from gemini_extract import TOKEN_RE, ReadProgress, RecordReducer, iter_chunks, iter_text, run_extraction
+
+
+class City(BaseModel):
+    name: str
+    country: str = ""
+    tags: list[str] = []
+
+
+def make_document(path, paragraphs=200):
+    text = "\n\n".join(
+        f"Paragraph {i}. The city of Town{i} lies in Country{i % 7}. Café ☕ number {i}."
+        for i in range(paragraphs)
+    )
+    path.write_text(text, encoding="utf-8")
+    return text
+
+
+def test_iter_text_decodes_characters_split_across_blocks(tmp_path):
+    text = make_document(tmp_path / "doc.txt", 50)
+    progress = ReadProgress((tmp_path / "doc.txt").stat().st_size)
+    # A 7-byte block size splits the multi-byte characters constantly
+    assert "".join(iter_text(str(tmp_path / "doc.txt"), progress, block_size=7)) == text
+    assert progress.bytes_read == progress.total_bytes
+
+
+def test_chunks_are_bounded_overlapping_and_cover_the_document(tmp_path):
+    text = make_document(tmp_path / "doc.txt")
+    progress = ReadProgress(len(text.encode()))
+    chunks = list(iter_chunks(iter_text(str(tmp_path / "doc.txt"), progress, 256), 120, 20))
+
+    assert len(chunks) > 5
+    assert all(chunk.tokens <= 120 for chunk in chunks)
+    for chunk in chunks:
+        assert text[chunk.offset:chunk.offset + len(chunk.text)] == chunk.text
+    for previous, chunk in zip(chunks, chunks[1:]):
+        # The next chunk starts inside the previous one: nothing is skipped
+        assert chunk.offset < previous.offset + len(previous.text)
+        overlap = text[chunk.offset:previous.offset + len(previous.text)]
+        assert 0 < len(TOKEN_RE.findall(overlap)) <= 21
+    assert chunks[-1].offset + len(chunks[-1].text) == len(text)
+    # Cuts prefer paragraph ends
+    assert sum(chunk.text.endswith("\n\n") for chunk in chunks[:-1]) >= len(chunks) // 2
+
+
+def test_reducer_merges_duplicates_in_document_order():
+    reducer = RecordReducer(City, key_fields=["name"])
+    reducer.add(1, [City(name="Lahore", tags=["food"]), City(name="Oslo")])
+    reducer.add(0, [City(name="  lahore ", country="PK", tags=["history", "food"])])
+
+    results = reducer.results()
+    # Lahore sorts first (seen in chunk 0) and is filled in from both copies
+    assert [city.name for city in results] == ["Lahore", "Oslo"]
+    assert results[0].country == "PK"
+    assert results[0].tags == ["food", "history"]
+    assert reducer.duplicates == 1
+
+
+def fake_extract(chunk, schema, wrapper, model, retries):
+    if "Paragraph 3." in chunk.text:
+        raise RuntimeError("upstream failed")
+    return [schema(name=name) for name in re.findall(r"Town\d+", chunk.text)]
+
+
+def test_run_extraction_dedupes_overlap_and_reports_failures(tmp_path, capsys):
+    make_document(tmp_path / "doc.txt", 60)
+    results, failed = run_extraction(str(tmp_path / "doc.txt"), City, ["name"],
+                                     max_tokens=120, overlap_tokens=20, extract=fake_extract)
+
+    names = [city.name for city in results]
+    assert len(names) == len(set(names))
+    assert "Town59" in names and "Town3" not in names
+    assert failed == [0]
+    assert capsys.readouterr().out == ""
+
+
+def test_main_writes_only_jsonl_to_stdout(tmp_path, capsys, monkeypatch):
+    make_document(tmp_path / "doc.txt", 30)
+    monkeypatch.setattr(gemini_extract, "extract_chunk", fake_extract)
+    monkeypatch.setattr(gemini_extract, "load_schema", lambda target: City)
+    args = SimpleNamespace(input=str(tmp_path / "doc.txt"), schema="x:City", key=["name"], output=None,
+                           chunk_tokens=120, overlap=20, concurrency=2, retries=0, model="m")
+
+    assert gemini_extract.main(args) == 1
+    captured = capsys.readouterr()
+    records = [json.loads(line) for line in captured.out.splitlines()]
+    assert records and all(set(record) == {"name", "country", "tags"} for record in records)
+    assert "unique records" in captured.err and "failed after retries" in captured.err
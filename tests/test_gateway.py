@@ -0,0 +1,71 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+import gemini_gateway
+from gemini_scheduler import Scheduler
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+    def model_dump_json(self):
+        return json.dumps({"choices": [{"delta": {"content": self.text}}]})
+
+
+def fake_client(create):
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    monkeypatch.setattr(gemini_gateway, "scheduler", Scheduler(concurrency=2))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), gemini_gateway.GatewayHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def use(create):
+        monkeypatch.setattr(gemini_gateway, "get_client", lambda: fake_client(create))
+        return f"http://127.0.0.1:{server.server_address[1]}{gemini_gateway.CHAT_PATH}"
+
+    yield use
+    server.shutdown()
+    server.server_close()
+
+
+def test_stream_failure_after_headers_ends_with_an_error_event(gateway):
+    def create(**payload):
+        yield Chunk("Hel")
+        raise RuntimeError("upstream reset")
+
+    response = httpx.post(gateway(create), json={"model": "m", "stream": True})
+    assert response.status_code == 200
+    assert "HTTP/1" not in response.text   # no second status line mid-stream
+    events = [json.loads(line[len("data: "):]) for line in response.text.split("\n\n") if line]
+    assert events[0]["choices"][0]["delta"]["content"] == "Hel"
+    assert events[-1] == {"error": "upstream reset"}
+
+
+def test_upstream_client_errors_keep_their_status(gateway):
+    def create(**payload):
+        request = httpx.Request("POST", "https://example.invalid/chat/completions")
+        raise openai.BadRequestError(
+            "model not found", response=httpx.Response(400, request=request), body=None
+        )
+
+    response = httpx.post(gateway(create), json={"model": "nope"})
+    assert response.status_code == 400
+    assert "model not found" in response.json()["error"]
+
+
+def test_other_upstream_failures_are_bad_gateway(gateway):
+    def create(**payload):
+        raise RuntimeError("connection refused")
+
+    assert httpx.post(gateway(create), json={"model": "m"}).status_code == 502
@@ -0,0 +1,92 @@
+import json
+
+import httpx
+import pytest
+
+import gemini_client
+from gemini_history import SEGMENT_SIZE, History, encode_params
+
+
+def sample_messages(n):
+    messages = [{"role": "system", "content": "You are a helpful assistant."}]
+    for i in range(n):
+        messages.append({"role": "user", "content": f"question {i} ✓"})
+        messages.append({
+            "role": "assistant",
+            "tool_calls": [{"id": f"c{i}", "type": "function",
+                            "function": {"name": "get_current_time", "arguments": '{"city": "Paris"}'}}],
+        })
+        messages.append({"role": "tool", "tool_call_id": f"c{i}", "name": "get_current_time",
+                         "content": json.dumps({"city": "Paris"})})
+    return messages
+
+
+def test_request_body_matches_plain_json():
+    messages = sample_messages(5)
+    params = encode_params(model="m", tool_choice="auto")
+    body = History(messages).request_body(params)
+    assert json.loads(body) == {"messages": messages, "model": "m", "tool_choice": "auto"}
+    assert json.loads(History(messages).request_body()) == {"messages": messages}
+
+
+def test_long_history_is_sealed_into_segments_and_round_trips():
+    messages = sample_messages(1500)
+    history = History(messages)
+    assert len(history._segments) > 1
+    assert len(history._open) < SEGMENT_SIZE
+    assert json.loads(history.request_body()) == {"messages": messages}
+    assert History.load_json(history.dump_json()).to_list() == messages
+
+
+def test_truncate_drops_the_failed_turn():
+    messages = sample_messages(1500)
+    history = History(messages)
+    history.append({"role": "user", "content": "this request failed"})
+    history.truncate(len(messages))
+    assert history.to_list() == messages
+    assert json.loads(history.request_body()) == {"messages": messages}
+
+
+# --------------------📨 post_chat_completion retries --------------------
+@pytest.fixture
+def fake_gemini(monkeypatch):
+    replies = []
+    bodies = []
+
+    def handler(request):
+        bodies.append(json.loads(request.read()))
+        status, payload = replies.pop(0)
+        return httpx.Response(status, json=payload)
+
+    client = httpx.Client(base_url="https://gemini.test/", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(gemini_client, "get_http", lambda: client)
+    monkeypatch.setattr(gemini_client.time, "sleep", lambda seconds: None)
+    return replies, bodies
+
+
+def test_rate_limit_is_retried_with_the_same_fragments(fake_gemini):
+    replies, bodies = fake_gemini
+    replies += [(429, {"error": "slow down"}), (503, {"error": "busy"}), (200, {"ok": True})]
+    parts = History(sample_messages(2)).request_parts(encode_params(model="m"))
+
+    assert gemini_client.post_chat_completion(parts) == {"ok": True}
+    assert len(bodies) == 3
+    assert bodies[0] == bodies[2] == json.loads(b"".join(parts))
+
+
+def test_error_body_is_reported_once_retries_run_out(fake_gemini):
+    replies, _ = fake_gemini
+    replies += [(429, {"error": "quota exhausted"})] * 3
+
+    with pytest.raises(gemini_client.ChatCompletionError, match="429.*quota exhausted") as info:
+        gemini_client.post_chat_completion(b'{"messages":[]}')
+    assert info.value.status == 429
+
+
+def test_client_errors_are_not_retried(fake_gemini):
+    replies, bodies = fake_gemini
+    replies += [(400, {"error": "bad model"})]
+
+    with pytest.raises(gemini_client.ChatCompletionError, match="bad model"):
+        gemini_client.post_chat_completion(b'{"messages":[]}')
+    assert len(bodies) == 1
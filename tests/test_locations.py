@@ -0,0 +1,93 @@
+import pytest
+
+from gemini_locations import get_index, normalize
+
+
+@pytest.fixture(scope="module")
+def index():
+    return get_index()
+
+
+@pytest.mark.parametrize("query, zone", [
+    ("Tokyo", "Asia/Tokyo"),
+    ("Zürich", "Europe/Zurich"),
+    ("Bombay", "Asia/Kolkata"),
+    ("NYC", "America/New_York"),
+    ("US/Eastern", "US/Eastern"),
+    ("san fran", "America/Los_Angeles"),
+    ("Toyko", "Asia/Tokyo"),
+    ("Tokio", "Asia/Tokyo"),
+    ("Madird", "Europe/Madrid"),
+    ("new yrok", "America/New_York"),
+    ("Paris, France", "Europe/Paris"),
+    ("Tokyo, JP", "Asia/Tokyo"),
+    ("New York, USA", "America/New_York"),
+    ("Seattle, Washington", "America/Los_Angeles"),
+    ("Londn, UK", "Europe/London"),
+    ("Hyderabad", "Asia/Kolkata"),
+    ("Hyderabad, Pakistan", "Asia/Karachi"),
+    ("Paris, Texas", "America/Chicago"),
+    ("London, Ontario", "America/Toronto"),
+    ("Łódź", "Europe/Warsaw"),
+    ("Lodz", "Europe/Warsaw"),
+])
+def test_resolves(index, query, zone):
+    assert index.resolve(query).timezone == zone
+
+
+@pytest.mark.parametrize("query, zone", [
+    ("Philadelphia", "America/New_York"),
+    ("San Diego", "America/Los_Angeles"),
+    ("Austin", "America/Chicago"),
+    ("Portland", "America/Los_Angeles"),   # the largest namesake
+    ("Portland, ME", "America/New_York"),
+    ("Lyon", "Europe/Paris"),
+    ("Naples", "Europe/Rome"),
+    ("Naples, FL", "America/New_York"),
+    ("Calgary", "America/Edmonton"),
+    ("Pune", "Asia/Kolkata"),
+])
+def test_resolves_cities_from_the_city_file(index, query, zone):
+    assert index.resolve(query).timezone == zone
+
+
+@pytest.mark.parametrize("query, zone", [
+    ("New York, NY", "America/New_York"),
+    ("Los Angeles, CA", "America/Los_Angeles"),
+    ("Dallas, TX", "America/Chicago"),
+    ("Chicago, IL", "America/Chicago"),
+    ("Denver, CO", "America/Denver"),
+    ("Atlanta, GA", "America/New_York"),
+    ("Savannah, Georgia", "America/New_York"),
+    ("Calgary, AB", "America/Edmonton"),
+    ("Perth, WA", "Australia/Perth"),
+    ("Seattle, WA", "America/Los_Angeles"),
+    # Two-letter codes that are also countries still work as countries
+    ("Toronto, CA", "America/Toronto"),
+    ("Bogota, CO", "America/Bogota"),
+    ("Pune, IN", "Asia/Kolkata"),
+    ("Libreville, GA", "Africa/Libreville"),
+    ("Tbilisi, Georgia", "Asia/Tbilisi"),
+])
+def test_resolves_state_and_province_qualifiers(index, query, zone):
+    assert index.resolve(query).timezone == zone
+
+
+@pytest.mark.parametrize("query", [
+    "Polnd",             # difflib used to land on the legacy zone "Poland"
+    "Mordor",
+    "Mars",              # four letters are one edit away from too many places
+    "Kuala",             # Kuala Lumpur, Kuala Terengganu...
+    "Dallas, CA",        # neither Canada nor California has one
+    "Lahore, India",
+    "Paris, Narnia",     # unknown qualifier
+    "",
+])
+def test_unknown_or_ambiguous_places_are_not_guessed(index, query):
+    assert index.resolve(query) is None
+
+
+def test_legacy_zones_are_exact_only(index):
+    assert normalize("Poland") in index.exact
+    assert normalize("Poland") not in index.keys
+    assert not any(" " in key and key.startswith("us ") for key in index.keys)
@@ -0,0 +1,51 @@
+import threading
+import time
+
+import gemini_profile
+
+
+def test_disabled_stage_is_a_shared_no_op():
+    assert gemini_profile.stage("network") is gemini_profile.NULL_STAGE
+    gemini_profile.checkpoint("turn", messages=1)
+
+
+def test_profiled_session_writes_a_report(tmp_path):
+    profiler = gemini_profile.enable(str(tmp_path), interval=0.001)
+    try:
+        kept = []
+        for turn in range(3):
+            gemini_profile.checkpoint("turn", messages=turn)
+            with gemini_profile.stage("serialize"):
+                kept.append(bytes(200_000))
+                with gemini_profile.stage("json"):
+                    time.sleep(0.01)
+    finally:
+        gemini_profile.disable()
+
+    assert profiler.stats["serialize"].calls == 3
+    assert profiler.stats["serialize/json"].calls == 3
+    assert profiler.stats["serialize"].net_alloc >= 3 * 200_000
+    assert profiler.stats["serialize/json"].samples > 0
+    for name in ("stages.txt", "stages.json", "flamegraph.folded", "memory.csv", "growth.txt"):
+        assert (tmp_path / name).exists()
+    assert "Per messages" in (tmp_path / "growth.txt").read_text()
+
+
+def test_sampler_survives_stacks_emptied_mid_sample(tmp_path):
+    # Many short stages in several threads keep popping stacks under the sampler
+    profiler = gemini_profile.enable(str(tmp_path), interval=0.0001)
+    try:
+        def churn():
+            for _ in range(3000):
+                with gemini_profile.stage("tiny"):
+                    pass
+
+        threads = [threading.Thread(target=churn) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert profiler._sampler.is_alive()
+    finally:
+        gemini_profile.disable()
+    assert profiler.stats["tiny"].calls == 12_000
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from gemini_scheduler import FairQueue, Job, LoadShed, Scheduler
+
+
+def drain(queue, now=0.0):
+    order = []
+    while (job := queue.pop(now)) is not None:
+        order.append(job)
+    return order
+
+
+def test_weighted_fair_share_within_a_class():
+    queue = FairQueue({"a": 2.0, "b": 1.0})
+    for i in range(30):
+        queue.push(Job("a", payload=i), 0.0)
+        queue.push(Job("b", payload=i), 0.0)
+
+    first = [job.tenant for job in drain(queue)[:30]]
+    assert first.count("a") == 20
+    assert first.count("b") == 10
+
+
+def test_interactive_before_batch_and_edf_within_a_tenant():
+    queue = FairQueue()
+    queue.push(Job("t", "batch", deadline=100.0, payload="batch"), 0.0)
+    queue.push(Job("t", deadline=50.0, payload="late"), 0.0)
+    queue.push(Job("t", deadline=10.0, payload="soon"), 0.0)
+
+    assert [job.payload for job in drain(queue)] == ["soon", "late", "batch"]
+
+
+def test_admission_counts_work_already_in_flight():
+    queue = FairQueue(capacity=1)
+    job = Job("t", "batch", deadline=0.5, cost=0.1)
+    assert queue.estimated_start(job, 0.0) == 0.0
+    assert not queue.push(job, 0.0, slot_wait=2.0)
+    assert job.shed_reason == "admission"
+
+
+def test_cancelled_jobs_are_skipped_and_release_their_cost():
+    queue = FairQueue()
+    cancelled, kept = Job("t", payload="cancelled"), Job("t", payload="kept")
+    queue.push(cancelled, 0.0)
+    queue.push(kept, 0.0)
+    queue.cancel(cancelled)
+
+    assert queue.classes[0].queued_cost == pytest.approx(1.0)
+    assert [job.payload for job in drain(queue)] == ["kept"]
+    assert queue.classes[0].queued_cost == pytest.approx(0.0)
+    assert queue.drain_shed() == []
+
+
+def occupy(scheduler, seconds):
+    started = threading.Event()
+
+    def work():
+        started.set()
+        time.sleep(seconds)
+
+    thread = threading.Thread(target=scheduler.run, args=(work,))
+    thread.start()
+    started.wait()
+    return thread
+
+
+def test_busy_slot_sheds_a_short_deadline_at_admission():
+    scheduler = Scheduler(concurrency=1, initial_estimate=2.0)
+    thread = occupy(scheduler, 0.5)
+    start = time.monotonic()
+    with pytest.raises(LoadShed, match="cannot finish"):
+        scheduler.run(lambda: None, tenant="late", priority="batch", timeout=0.5)
+    assert time.monotonic() - start < 0.1
+    thread.join()
+
+
+def test_queued_job_gives_up_at_its_deadline():
+    # The estimate says the slot frees up soon, but the running call overruns
+    scheduler = Scheduler(concurrency=1, initial_estimate=0.05)
+    thread = occupy(scheduler, 0.6)
+    start = time.monotonic()
+    with pytest.raises(LoadShed, match="expired"):
+        scheduler.run(lambda: None, tenant="late", timeout=0.2)
+    assert time.monotonic() - start < 0.3
+    thread.join()
+
+    assert scheduler.run(lambda: "ran") == "ran"
+    assert len(scheduler.queue) == 0
+    assert scheduler.queue.classes[0].queued_cost == pytest.approx(0.0)
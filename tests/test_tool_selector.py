@@ -0,0 +1,99 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from gemini_bench import synthetic_tools
+from gemini_tool_selector import SEARCH_TOOL, ToolSelector, create_with_tools
+
+
+@pytest.fixture(scope="module")
+def registry():
+    return [tool for tool, _, _ in synthetic_tools()]
+
+
+def names(tools):
+    return [tool["function"]["name"] for tool in tools]
+
+
+@pytest.mark.parametrize("k", [0, -1])
+def test_k_must_be_positive(registry, k):
+    with pytest.raises(ValueError, match="k must be at least 1"):
+        ToolSelector(registry, k=k)
+
+
+def test_selects_k_relevant_tools_plus_pinned(registry):
+    selector = ToolSelector(registry, k=4, pinned=["delete_security_alert_rule"])
+    chosen = names(selector.select([{"role": "user", "content": "create a refund in billing"}]))
+
+    assert len(chosen) == 5
+    assert "delete_security_alert_rule" in chosen
+    assert "create_billing_refund" in chosen
+    assert sum(name.endswith("_billing_refund") for name in chosen) == 4
+    assert chosen == sorted(chosen, key=[t["function"]["name"] for t in registry].index)
+
+
+def test_small_registry_is_sent_whole(registry):
+    selector = ToolSelector(registry[:3], k=8)
+    assert selector.select([{"role": "user", "content": "anything"}]) == registry[:3]
+
+
+def test_unknown_pinned_tool_is_rejected(registry):
+    with pytest.raises(ValueError, match="not in the registry"):
+        ToolSelector(registry, pinned=["no_such_tool"])
+
+
+def test_weak_matches_send_the_full_list(registry):
+    selector = ToolSelector(registry, k=4)
+    chosen = selector.select([{"role": "user", "content": "pull up the outlook for rain tomorrow"}])
+
+    assert chosen == registry
+    assert selector.stats["full_lists"] == 1
+
+
+class ScriptedClient:
+    """Replies with the given tool calls in turn and records the tools offered."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.offered = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, tools, **kwargs):
+        self.offered.append(names(tools))
+        calls = [
+            {"id": f"call_{i}", "type": "function",
+             "function": {"name": name, "arguments": json.dumps(args)}}
+            for i, (name, args) in enumerate(self.replies.pop(0))
+        ]
+        message = SimpleNamespace(role="assistant", content=None, tool_calls=calls or None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_search_tools_adds_the_schemas_the_model_asks_for(registry):
+    selector = ToolSelector(registry, k=4)
+    client = ScriptedClient(
+        [("search_tools", {"query": "get the weather forecast"})],
+        [("get_weather_forecast", {})],
+    )
+    messages = [{"role": "user", "content": "create a refund in billing"}]
+
+    response, tools = create_with_tools(client, selector, messages)
+
+    assert "search_tools" in client.offered[0]
+    assert "get_weather_forecast" not in client.offered[0]
+    assert "get_weather_forecast" in client.offered[1]
+    assert "get_weather_forecast" in names(tools) and "search_tools" not in names(tools)
+    assert response.choices[0].message.tool_calls[0]["function"]["name"] == "get_weather_forecast"
+
+
+def test_search_tools_is_not_offered_on_the_last_attempt(registry):
+    selector = ToolSelector(registry, k=4)
+    client = ScriptedClient(
+        [("search_tools", {"query": "weather forecast"})],
+        [("search_tools", {"query": "air quality"})],
+        [],
+    )
+    create_with_tools(client, selector, [{"role": "user", "content": "create a refund in billing"}])
+
+    assert [SEARCH_TOOL["function"]["name"] in offered for offered in client.offered] == [True, True, False]
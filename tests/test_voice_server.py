@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from gemini_bench import synthetic_utterance, voice_client_turn
+from gemini_voice_server import (
+    SAMPLE_RATE, EnergyVAD, LocalVoiceBackend, SentenceChunker, VoiceServer, mulaw_decode, mulaw_encode,
+)
+
+
+def test_mulaw_matches_g711_reference_values():
+    assert mulaw_encode(np.array([0, -1, 32767, -32768], dtype=np.int16)) == bytes([0xFF, 0x7F, 0x80, 0x00])
+    assert list(mulaw_decode(bytes([0xFF, 0x7F, 0x80, 0x00]))) == [0, 0, 32124, -32124]
+
+
+def test_mulaw_round_trip_keeps_speech_quality():
+    signal = synthetic_utterance(SAMPLE_RATE).astype(np.float64)
+    decoded = mulaw_decode(mulaw_encode(signal.astype(np.int16))).astype(np.float64)
+    snr = 10 * np.log10((signal ** 2).sum() / ((signal - decoded) ** 2).sum())
+    assert snr > 30
+
+
+def silence(ms):
+    return np.zeros(SAMPLE_RATE * ms // 1000, dtype=np.int16)
+
+
+def feed_in_odd_sizes(vad, pcm):
+    events = []
+    for start in range(0, len(pcm), 123):
+        events += vad.feed(pcm[start:start + 123])
+    return events
+
+
+def test_vad_reports_one_utterance_with_preroll():
+    speech = synthetic_utterance(SAMPLE_RATE, seconds=1.0)
+    vad = EnergyVAD()
+    events = feed_in_odd_sizes(vad, np.concatenate((silence(500), speech, silence(800))))
+
+    assert [event for event, _ in events] == ["start", "end"]
+    utterance = np.frombuffer(events[1][1], dtype=np.int16)
+    # All the speech, plus preroll before it and a short tail after it
+    assert len(speech) < len(utterance) < len(speech) + SAMPLE_RATE // 2
+    assert not vad.in_speech
+
+
+def test_vad_ignores_noise_and_can_be_flushed():
+    vad = EnergyVAD()
+    noise = (np.random.default_rng(1).standard_normal(SAMPLE_RATE) * 80).astype(np.int16)
+    assert feed_in_odd_sizes(vad, noise) == []
+    assert vad.flush() == []
+
+    events = vad.feed(synthetic_utterance(SAMPLE_RATE, seconds=0.5))
+    assert [event for event, _ in events] == ["start"]
+    assert [event for event, _ in vad.flush()] == ["end"]
+
+
+def test_sentence_chunker_merges_short_fragments():
+    chunker = SentenceChunker()
+    sentences = []
+    text = "Sure. The weather in Paris is sunny today! It will be 26 degrees this afternoon. Enjoy"
+    for word in text.split(" "):
+        sentences += chunker.feed(word + " ")
+    assert sentences == ["Sure. The weather in Paris is sunny today!", "It will be 26 degrees this afternoon."]
+    assert chunker.flush() == ["Enjoy"]
+
+
+@pytest.mark.parametrize("barge_in", [False, True])
+def test_local_session_end_to_end(barge_in):
+    async def scenario():
+        backend = LocalVoiceBackend()
+        server = await VoiceServer(backend, max_sessions=4).start("127.0.0.1", 0)
+        url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        try:
+            return await voice_client_turn(url, synthetic_utterance(SAMPLE_RATE, seconds=0.6), barge_in)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    result = asyncio.run(scenario())
+    assert "error" not in result
+    assert result["speech_end"] < result["transcript"] < result["first_token"] < result["first_audio"]
+    if barge_in:
+        assert result["barge_in"] < result["interrupted"]
+    else:
+        assert set(result["server"]) >= {"transcript_ms", "first_token_ms", "first_audio_ms", "done_ms"}
+
+
+def test_bad_control_frames_get_an_error_and_keep_the_session():
+    from websockets.asyncio.client import connect
+
+    async def scenario():
+        server = await VoiceServer(LocalVoiceBackend(), max_sessions=4).start("127.0.0.1", 0)
+        url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        try:
+            async with connect(url) as ws:
+                replies = [json.loads(await ws.recv())]   # ready
+                for frame in ("not json", "[1, 2]", '"flush"'):
+                    await ws.send(frame)
+                    replies.append(json.loads(await ws.recv()))
+                await ws.send(json.dumps({"type": "flush"}))
+                await ws.send(json.dumps({"type": "bye"}))
+                await ws.wait_closed()
+                return replies, ws.close_code
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    replies, close_code = asyncio.run(scenario())
+    assert replies[0]["type"] == "ready"
+    assert [reply["type"] for reply in replies[1:]] == ["error"] * 3
+    assert close_code == 1000